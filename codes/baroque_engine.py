@@ -1,4 +1,24 @@
+import hashlib
+import heapq
+import inspect
+import json
+import logging
+import math
 import random
+import sqlite3
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger("baroque_engine")
+logger.addHandler(logging.NullHandler())
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 # --- KURALLAR ---
 class CounterpointRules:
@@ -85,9 +105,16 @@ class CounterpointRules:
 
 # --- KONTROL FONKSIYONLARI ---
 def check_hard_constraints_verbose(rules, cf_notes, cp_notes, current_idx, indent=""):
+    if current_idx == 0: return True
+    return check_hard_transition(rules, cf_notes, current_idx, cp_notes[current_idx-1], cp_notes[current_idx])
+
+def check_hard_transition(rules, cf_notes, current_idx, cp_prev, cp_curr):
+    """
+    Tek bir gecisin hard kontrolu: tum melodi yerine sadece (onceki cp,
+    simdiki cp) ciftine bakar. DP gibi durum tabanli aramalar bunu kullanir.
+    """
     if current_idx == 0: return True
     cf_prev, cf_curr = cf_notes[current_idx-1], cf_notes[current_idx]
-    cp_prev, cp_curr = cp_notes[current_idx-1], cp_notes[current_idx]
     is_strong = (current_idx % 2 == 0)
 
     # Ozel Kural: Bitis (Tonik/Oktav)
@@ -95,57 +122,288 @@ def check_hard_constraints_verbose(rules, cf_notes, cp_notes, current_idx, inden
         if (abs(cf_curr - cp_curr) % 12) != 0: return False
 
     if not rules.hc_parallel_fifths_octaves(cf_prev, cf_curr, cp_prev, cp_curr): return False
-    if not rules.hc_consonant_interval(cf_curr, cp_curr, is_strong): return False 
+    if not rules.hc_consonant_interval(cf_curr, cp_curr, is_strong): return False
     if not rules.hc_suspension_resolution(cf_prev, cp_prev, cf_curr, cp_curr): return False
     if not rules.hc_no_augmented_melodic(cp_prev, cp_curr): return False
     return True
 
+def calculate_position_score(rules, cf_notes, i, cp_prev, cp_curr, cp_next):
+    """i. pozisyonun soft puani. Sadece (onceki, simdiki, sonraki) notaya bakar."""
+    cf_prev, cf_curr = cf_notes[i-1], cf_notes[i]
+    is_strong = (i % 2 == 0)
+
+    score = rules.sc_accented_dissonance(cf_prev, cf_curr, cp_prev, cp_curr, cp_next, is_strong)
+    score += rules.sc_passing_tone(cf_curr, cp_prev, cp_curr, cp_next, is_strong)
+    score += rules.sc_contrary_motion(cf_prev, cf_curr, cp_prev, cp_curr)
+    score += rules.sc_hidden_parallels(cf_prev, cf_curr, cp_prev, cp_curr)
+    score += rules.sc_close_position(cf_curr, cp_curr)
+    return score
+
 def calculate_total_score_verbose(rules, cf_notes, cp_notes):
     score = 0
     for i in range(1, len(cp_notes)):
-        cf_prev, cf_curr = cf_notes[i-1], cf_notes[i]
-        cp_prev, cp_curr = cp_notes[i-1], cp_notes[i]
         cp_next = cp_notes[i+1] if i+1 < len(cp_notes) else None
-        is_strong = (i % 2 == 0)
-        
-        score += rules.sc_accented_dissonance(cf_prev, cf_curr, cp_prev, cp_curr, cp_next, is_strong)
-        score += rules.sc_passing_tone(cf_curr, cp_prev, cp_curr, cp_next, is_strong)
-        score += rules.sc_contrary_motion(cf_prev, cf_curr, cp_prev, cp_curr)
-        score += rules.sc_hidden_parallels(cf_prev, cf_curr, cp_prev, cp_curr)
-        score += rules.sc_close_position(cf_curr, cp_curr)
+        score += calculate_position_score(rules, cf_notes, i, cp_notes[i-1], cp_notes[i], cp_next)
     return score
 
+# --- TOPLU (VEKTOREL) PUANLAMA ---
+SOFT_RULES = ('sc_accented_dissonance', 'sc_passing_tone', 'sc_contrary_motion',
+              'sc_hidden_parallels', 'sc_close_position')
+
+def _soft_terms(rules, cf_prev, cf_curr, cp_prev, cp_curr, cp_next, has_next, is_strong):
+    """
+    SOFT_RULES sirasinda kural puanlari (yayinlanabilir NumPy dizileri).
+    has_next False olan yerlerde cp_next yok sayilir.
+    """
+    harmonic = np.abs(cf_curr - cp_curr)
+    consonant = np.isin(harmonic % 12, list(rules.consonances))
+    motion = cp_curr - cp_prev
+    next_motion = cp_next - cp_curr
+    step = np.isin(np.abs(motion), (1, 2))
+    skip = np.abs(motion) >= 3
+    next_step = np.isin(np.abs(next_motion), (1, 2)) & has_next
+    dir_cf = np.sign(cf_curr - cf_prev)
+    dir_cp = np.sign(motion)
+
+    accented = is_strong & ~consonant & skip & next_step & (np.sign(next_motion) == -1)
+    passing = ~is_strong & ~consonant & step & next_step & (dir_cp == np.sign(next_motion))
+    contrary = (dir_cf != 0) & (dir_cp != 0) & (dir_cf != dir_cp)
+    hidden = np.isin(harmonic % 12, (0, 7)) & (dir_cf == dir_cp) & skip
+    close = harmonic < 16
+    return (5 * accented, 2 * passing, 2 * contrary, -5 * hidden, 1 * close)
+
+def score_batch(rules, cf_notes, melodies, weights=None, return_terms=False):
+    """
+    Bircok melodiyi NumPy ile tek seferde puanlar. melodies: (m, n) dizi.
+    CounterpointRules.sc_* kurallarinin birebir vektorel karsiligidir;
+    weights verilmezse sonuc calculate_total_score_verbose ile aynidir.
+    weights: SOFT_RULES sirasinda kural basina carpanlar.
+    return_terms=True ise (toplam, (m, 5) kural toplamlari) doner.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("score_batch icin numpy gerekli (pip install numpy)")
+    cp = np.asarray(melodies, dtype=np.int64)
+    if cp.ndim == 1: cp = cp[None, :]
+    m, n = cp.shape
+    terms = np.zeros((m, len(SOFT_RULES)), dtype=np.int64)
+    if n >= 2:
+        cf = np.asarray(cf_notes[:n], dtype=np.int64)[None, :]
+        cf_prev, cf_curr = cf[:, :-1], cf[:, 1:]
+        cp_prev, cp_curr = cp[:, :-1], cp[:, 1:]
+        # Son pozisyonun sonraki notasi yok: has_next ile maskelenir
+        cp_next = np.concatenate([cp[:, 2:], cp[:, -1:]], axis=1)
+        has_next = np.arange(1, n) < n - 1
+        is_strong = (np.arange(1, n) % 2 == 0)[None, :]
+
+        for r, term in enumerate(_soft_terms(rules, cf_prev, cf_curr, cp_prev, cp_curr, cp_next, has_next, is_strong)):
+            terms[:, r] = term.sum(axis=1)
+
+    totals = terms.sum(axis=1) if weights is None else terms @ np.asarray(weights, dtype=np.float64)
+    return (totals, terms) if return_terms else totals
+
+# --- LOGLAMA ---
+def enable_console_logging(level=logging.INFO):
+    """
+    Motor mesajlarini stdout'a yazar. Uygulama root logger'i zaten
+    yapilandirdiysa (logging.basicConfig vb.) sadece seviye ayarlanir.
+    """
+    if logger.level == logging.NOTSET or logger.level > level:
+        logger.setLevel(level)
+    if logging.getLogger().handlers: return
+    if any(isinstance(handler, logging.StreamHandler) for handler in logger.handlers): return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+
 # --- EVRENSEL SOLVER  ---
+# Nota Ismi -> MIDI Numarasi (0-11)
+NOTE_MAP = {
+    'C':0, 'C#':1, 'DB':1, 'D':2, 'D#':3, 'EB':3, 
+    'E':4, 'F':5, 'F#':6, 'GB':6, 'G':7, 'G#':8, 
+    'AB':8, 'A':9, 'A#':10, 'BB':10, 'B':11
+}
+
+def _log_sum_exp(values):
+    top = max(values)
+    return top + math.log(sum(math.exp(value - top) for value in values))
+
+def _weighted_choice(rng, items, weights):
+    """Agirlikli secim; int agirliklarda (cozum sayilari) kayan nokta hatasi olmadan."""
+    total = sum(weights)
+    point = rng.randrange(total) if isinstance(total, int) else rng.random() * total
+    for item, weight in zip(items, weights):
+        if point < weight: return item
+        point -= weight
+    return items[-1]
+
+def _iter_bits(mask):
+    """Maskedeki 1 bitlerinin indekslerini kucukten buyuge dondurur."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _unlink(node):
+    """(nota, ust dugum) bagli listesini bastan sona melodiye cevirir."""
+    melody = []
+    while node is not None:
+        melody.append(node[0])
+        node = node[1]
+    return melody[::-1]
+
+# Gecis maskesinde aday basina calisan hard kurallar (varsayilan sira)
+HARD_TRANSITION_RULES = ('hc_parallel_fifths_octaves', 'hc_suspension_resolution', 'hc_no_augmented_melodic')
+
+def _luby(i):
+    """Luby dizisinin i. terimi (1'den baslar): 1, 1, 2, 1, 1, 2, 4, 1, ..."""
+    while True:
+        k = i.bit_length()
+        if i == (1 << k) - 1: return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+# --- ARAMA ISTATISTIKLERI ---
+# SearchStats'in arama sayaclari ve her yontemin gercekten tuttuklari
+_SEARCH_COUNTERS = ('nodes_expanded', 'candidates_tested', 'rejections', 'max_depth', 'backtracks_per_depth')
+_TRACKED_COUNTERS = {'backtrack': _SEARCH_COUNTERS, 'iterative': _SEARCH_COUNTERS,
+                     'restart': _SEARCH_COUNTERS, 'bnb': ('nodes_expanded',)}
+
+class SearchStats:
+    """
+    Tek bir solve(stats=True) cagrisinin arama istatistikleri.
+    rejections: pencere adaylari, onlari reddeden ilk kurala gore sayilir
+    (scale, cadence, hc_consonant_interval, hc_order sirasiyla gecis kurallari,
+    ve bitise ulasamayan adaylar icin unreachable). backtracks_per_depth[d]:
+    d. notanin geri alinma sayisi. Sureler saniye cinsindendir. Yontemin
+    tutmadigi sayaclar (dp, beam, local, parallel, onbellek isabeti; bnb'de
+    dugum disindakiler) None'dir: olculmedi demektir, sifir is degil.
+    """
+    def __init__(self):
+        self.nodes_expanded = 0
+        self.candidates_tested = 0
+        self.rejections = {}
+        self.max_depth = 0
+        self.backtracks_per_depth = {}
+        self.time_to_first_solution = None
+        self.total_time = None
+        self.hc_order = None
+        self._started = time.perf_counter()
+
+    def untrack(self, keep=()):
+        """keep disindaki arama sayaclarini None (olculmedi) yapar."""
+        for name in _SEARCH_COUNTERS:
+            if name not in keep: setattr(self, name, None)
+
+    def as_dict(self):
+        return {
+            'nodes_expanded': self.nodes_expanded,
+            'candidates_tested': self.candidates_tested,
+            'rejections': None if self.rejections is None else dict(self.rejections),
+            'max_depth': self.max_depth,
+            'backtracks_per_depth': (None if self.backtracks_per_depth is None
+                                     else dict(sorted(self.backtracks_per_depth.items()))),
+            'time_to_first_solution': self.time_to_first_solution,
+            'total_time': self.total_time,
+            'hc_order': self.hc_order,
+        }
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
 
 class UniversalBaroqueSolver:
-    def __init__(self, cantus_firmus, key_root_name='C', mode='major'):
+    def __init__(self, cantus_firmus, key_root_name='C', mode='major', verbose=False):
         self.cf = cantus_firmus
+        # Kutuphane kullaniminda sessiz: mesajlar DEBUG seviyesinde loglanir.
+        # verbose=True ise INFO/WARNING seviyesinde ve konsola yazilir.
+        self.verbose = verbose
+        if verbose: enable_console_logging()
+        self.log_timing = False  # True ise her solve() sonunda sure kaydi (INFO) loglanir
         self.rules = CounterpointRules()
-        self.solutions = []
         self.min_interval = 0  
         self.max_interval = 16
         self.target_solutions = 1000 
+        self.top_k = 100  # Bellekte tutulan en iyi cozum sayisi
+        self._reset_solutions()
+        self.cache = None  # Istege bagli SolutionCache
+        self._set_limits(None, None)  # solve(deadline=..., node_budget=...) sinirlari
+        # solve(method="restart") ayarlari: "luby" ya da "geometric" dugum sinirlari
+        self.restart_schedule = "luby"
+        self.restart_base_nodes = 200
+        self.restart_growth = 1.5
+        self.restart_seed = None
+        self._tie_rng = None  # Yeniden baslatmalarda esit puanli adaylar icin rastgele sira
+        self._restart_seen = None
+        # solve(method="local") ayarlari: tavlama sicakligi baslangic -> bitis (geometrik)
+        self.local_start_temperature = 2.0
+        self.local_end_temperature = 0.05
+        self.local_seed = None
+        # Hard kural sirasi: ilk hc_warmup aday olculur, sonra en secici kural one alinir
+        self.hc_warmup = 256
+        self.hc_order = list(HARD_TRANSITION_RULES)
+        self.hc_rejections = dict.fromkeys(HARD_TRANSITION_RULES, 0)
+        self.hc_tested = 0
+        self.hc_evaluations = 0
+        self.stats = None  # solve(stats=True) ise SearchStats; kapaliyken maliyeti yok
+        self._open_end = False  # Akis pencereleri: cf burada bitmiyorsa bitis (kadans) kurali yok
+        self._cf_key = (None, 0, False)  # reach onbelleginin kuruldugu (cf, uzunluk, acik bitis)
         
         # --- TON AYARLAMA MOTORU ---
         self.key_root_name = key_root_name
         self.mode = mode
         self.allowed_pitch_classes = self._generate_scale_filter()
-        print(f"[i] Ton Ayarlandi: {key_root_name} {mode.capitalize()}")
-        print(f"[i] Izin Verilen Nota Siniflari: {self.allowed_pitch_classes}")
+        self._log(f"[i] Ton Ayarlandi: {key_root_name} {mode.capitalize()}")
+        self._log(f"[i] Izin Verilen Nota Siniflari: {self.allowed_pitch_classes}")
+
+    def _log(self, message, level=logging.INFO):
+        logger.log(level if self.verbose else logging.DEBUG, message)
+
+    # --- COZUM DEPOSU (TOP-K) ---
+    # self.solutions bir min-heap: (puan, -bulunma_sirasi, melodi). Heap'in
+    # tepesinde en kotu tutulan cozum durur; K dolunca daha iyisi gelirse
+    # yer degistirir. Melodiler kompakt tamsayi dizisi (array('h')) olarak saklanir,
+    # boylece target_solutions ne kadar buyuk olursa olsun bellek O(K*n) kalir.
+
+    def _reset_solutions(self):
+        self.solutions = []
+        self.num_solutions = 0
+
+    def _record_solution(self, melody, score):
+        if self._restart_seen is not None:
+            # Yeniden baslatmalarda ayni melodi birden cok kez bulunabilir.
+            # Melodinin kendisi degil hash'i tutulur: bellek nota sayisindan bagimsiz.
+            key = hash(tuple(melody))
+            if key in self._restart_seen: return
+            self._restart_seen.add(key)
+        if self.stats is not None and self.stats.time_to_first_solution is None:
+            self.stats.time_to_first_solution = time.perf_counter() - self.stats._started
+        self.num_solutions += 1
+        entry = (score, -self.num_solutions, array('h', melody))
+        if len(self.solutions) < self.top_k:
+            heapq.heappush(self.solutions, entry)
+        elif entry > self.solutions[0]:
+            heapq.heapreplace(self.solutions, entry)
+
+    def get_ranked_solutions(self):
+        """Tutulan en iyi K cozum; puana gore, esitlikte bulunma sirasina gore."""
+        return [{'melody': list(melody), 'score': score}
+                for score, _, melody in sorted(self.solutions, reverse=True)]
+
+    def rerank_solutions(self, weights=None):
+        """
+        Tutulan cozumleri score_batch ile (istege bagli kural agirliklariyla)
+        tek seferde yeniden puanlar ve siralar. Esitlikte bulunma sirasi korunur.
+        """
+        ranked = sorted(self.solutions, reverse=True)
+        if not ranked: return []
+        scores = score_batch(self.rules, self.cf, [list(melody) for _, _, melody in ranked], weights)
+        order = sorted(range(len(ranked)), key=lambda k: (-scores[k], k))
+        return [{'melody': list(ranked[k][2]), 'score': scores[k].item()} for k in order]
 
     def _generate_scale_filter(self):
         """
         Verilen kok ses ve moda gore izin verilen MIDI modlarini hesaplar.
         Ornek: Eb Major -> {3, 5, 7, 8, 10, 0, 2}
         """
-        # Nota Ismi -> MIDI Numarasi (0-11)
-        note_map = {
-            'C':0, 'C#':1, 'DB':1, 'D':2, 'D#':3, 'EB':3, 
-            'E':4, 'F':5, 'F#':6, 'GB':6, 'G':7, 'G#':8, 
-            'AB':8, 'A':9, 'A#':10, 'BB':10, 'B':11
-        }
-        
-        root = note_map[self.key_root_name.upper()]
+        root = NOTE_MAP[self.key_root_name.upper()]
         
         # Skala Formulleri (Semiton farklari)
         if self.mode.lower() == 'major':
@@ -161,91 +419,1452 @@ class UniversalBaroqueSolver:
             
         return allowed
 
-    def get_valid_candidates(self, idx, current_melody, indent):
+    # --- BITMASK DOMAIN ---
+    # Aralik penceresi kucuk oldugu icin domain bir tamsayi bitmask'i olarak
+    # tutulur: bit k <-> interval = min_interval + k (cp = cf + interval).
+    # Hard kurallar sadece araliklara baktigi icin her kural bir kez, temsilci
+    # notalar uzerinde degerlendirilip maske tablosuna derlenir.
+
+    def _ensure_masks(self):
+        # Erisilebilirlik indeksi cf'ye bagli: cf yeniden atanir (ya da acik
+        # bitis degisir) ise bir sonraki erisimde temizlenir
+        if self._cf_key[0] is not self.cf or self._cf_key[1:] != (len(self.cf), self._open_end):
+            self._cf_key = (self.cf, len(self.cf), self._open_end)
+            self._reach = None
+        window = (self.min_interval, self.max_interval)
+        if getattr(self, '_mask_window', None) == window: return
+        self._mask_window = window
+        intervals = range(self.min_interval, self.max_interval + 1)
+
+        self._strong_mask = 0
+        self._final_mask = 0
+        for bit, interval in enumerate(intervals):
+            if self.rules.hc_consonant_interval(0, interval, True): self._strong_mask |= 1 << bit
+            if (abs(interval) % 12) == 0: self._final_mask |= 1 << bit
+
+        # cf nota sinifi -> ton icindeki araliklar
+        self._scale_masks = []
+        for pitch_class in range(12):
+            mask = 0
+            for bit, interval in enumerate(intervals):
+                if ((pitch_class + interval) % 12) in self.allowed_pitch_classes: mask |= 1 << bit
+            self._scale_masks.append(mask)
+
+        # (cf hareketi, onceki cp araligi) -> gecis maskesi, ihtiyac oldukca derlenir
+        self._transition_masks = {}
+        self._rule_masks = {}
+        self._order_cache = {}
+        self._reach = None
+
+    def _compile_transition_mask(self, cf_motion, prev_interval):
+        """
+        Paralel, suspension ve artik melodik aralik kurallarinin maskesi. Isinma
+        suresince (ilk hc_warmup aday) her aday tum kurallardan gecer ve her
+        kuralin reddettigi aday sayisi sayilir; sonra kurallar hc_order
+        sirasiyla kisa devreli calisir. Maske sonucu siradan bagimsizdir.
+        """
+        rules = self.rules
+        cf_prev, cf_curr = 0, cf_motion
+        cp_prev = prev_interval
+        checks = {
+            'hc_parallel_fifths_octaves': lambda cp_curr: rules.hc_parallel_fifths_octaves(cf_prev, cf_curr, cp_prev, cp_curr),
+            'hc_suspension_resolution': lambda cp_curr: rules.hc_suspension_resolution(cf_prev, cp_prev, cf_curr, cp_curr),
+            'hc_no_augmented_melodic': lambda cp_curr: rules.hc_no_augmented_melodic(cp_prev, cp_curr),
+        }
+        mask = 0
+        for bit, interval in enumerate(range(self.min_interval, self.max_interval + 1)):
+            cp_curr = cf_curr + interval
+            self.hc_tested += 1
+            passed = True
+            if self.hc_tested <= self.hc_warmup:
+                for name in self.hc_order:
+                    self.hc_evaluations += 1
+                    if not checks[name](cp_curr):
+                        self.hc_rejections[name] += 1
+                        passed = False
+                if self.hc_tested == self.hc_warmup:
+                    self._reorder_hard_rules()
+            else:
+                for name in self.hc_order:
+                    self.hc_evaluations += 1
+                    if not checks[name](cp_curr):
+                        passed = False
+                        break
+            if passed: mask |= 1 << bit
+        self._transition_masks[(cf_motion, prev_interval)] = mask
+        return mask
+
+    def _reorder_hard_rules(self):
+        """Isinmada en cok reddeden kural en once (esitlikte varsayilan sira)."""
+        self.hc_order.sort(key=lambda name: -self.hc_rejections[name])
+
+    def _compile_rule_masks(self, cf_motion, prev_interval):
+        """Sadece istatistik icin: gecis kurallarinin her biri icin ayri maske."""
+        key = (cf_motion, prev_interval)
+        masks = self._rule_masks.get(key)
+        if masks is None:
+            rules = self.rules
+            masks = dict.fromkeys(HARD_TRANSITION_RULES, 0)
+            for bit, interval in enumerate(range(self.min_interval, self.max_interval + 1)):
+                cp_curr = cf_motion + interval
+                if rules.hc_parallel_fifths_octaves(0, cf_motion, prev_interval, cp_curr):
+                    masks['hc_parallel_fifths_octaves'] |= 1 << bit
+                if rules.hc_suspension_resolution(0, prev_interval, cf_motion, cp_curr):
+                    masks['hc_suspension_resolution'] |= 1 << bit
+                if rules.hc_no_augmented_melodic(prev_interval, cp_curr):
+                    masks['hc_no_augmented_melodic'] |= 1 << bit
+            self._rule_masks[key] = masks
+        return masks
+
+    def _count_expansion(self, idx, prev_cp):
+        """Istatistik: idx dugumunun acilmasi; pencere adaylarini reddeden ilk kurala yazar."""
+        stats = self.stats
+        stats.nodes_expanded += 1
+        width = self.max_interval - self.min_interval + 1
+        stats.candidates_tested += width
+        checks = [('scale', self._scale_masks[self.cf[idx] % 12])]
+        if idx > 0:
+            if idx == len(self.cf) - 1: checks.append(('cadence', self._final_mask))
+            if idx % 2 == 0: checks.append(('hc_consonant_interval', self._strong_mask))
+            rule_masks = self._compile_rule_masks(self.cf[idx] - self.cf[idx-1], prev_cp - self.cf[idx-1])
+            checks += [(name, rule_masks[name]) for name in self.hc_order]
+        checks.append(('unreachable', self._reachable_masks()[idx]))
+        alive = (1 << width) - 1
+        for name, mask in checks:
+            rejected = alive & ~mask
+            if rejected:
+                stats.rejections[name] = stats.rejections.get(name, 0) + bin(rejected).count('1')
+                alive &= mask
+
+    def _base_mask(self, idx):
+        """idx pozisyonunun onceki notadan bagimsiz maskesi (ton, vurgu, bitis)."""
+        self._ensure_masks()
+        mask = self._scale_masks[self.cf[idx] % 12]
+        if idx == 0: return mask
+        if idx % 2 == 0: mask &= self._strong_mask
+        if idx == len(self.cf) - 1 and not self._open_end: mask &= self._final_mask
+        return mask
+
+    def _candidate_mask(self, idx, prev_cp):
+        """idx pozisyonunda hard kurallari gecen araliklarin maskesi."""
+        mask = self._base_mask(idx)
+        if idx == 0: return mask
+
+        cf_note, cf_prev = self.cf[idx], self.cf[idx-1]
+        transition = self._transition_masks.get((cf_note - cf_prev, prev_cp - cf_prev))
+        if transition is None:
+            transition = self._compile_transition_mask(cf_note - cf_prev, prev_cp - cf_prev)
+        return mask & transition
+
+    # --- BITIS ERISILEBILIRLIK INDEKSI ---
+    def _reachable_masks(self):
+        """
+        Aramadan once geriye dogru tek gecis: reach[i], cp[i] olarak secildiginde
+        hard kurallar altinda gecerli bir bitise (oktav/unison) hala
+        ulasilabilen araliklarin maskesidir. Aday uretimi bu maskeyle kesilir;
+        reach[0] bossa bolumun hic cozumu yoktur.
+        """
+        self._ensure_masks()
+        if self._reach is not None: return self._reach
+        n = len(self.cf)
+        reach = [0] * n
+        if n:
+            reach[n - 1] = self._base_mask(n - 1)
+        for i in range(n - 2, -1, -1):
+            cf_note = self.cf[i]
+            mask = 0
+            for bit in _iter_bits(self._base_mask(i)):
+                cp_note = cf_note + self.min_interval + bit
+                if self._candidate_mask(i + 1, cp_note) & reach[i + 1]:
+                    mask |= 1 << bit
+            reach[i] = mask
+        self._reach = reach
+        return reach
+
+    def is_feasible(self):
+        """Bolumun en az bir gecerli kontrpuani var mi? (tek geri gecis, arama yok)"""
+        return not self.cf or self._reachable_masks()[0] != 0
+
+    def _heuristic_score(self, interval, cf_note, prev_cf, prev_cp):
+        candidate_note = cf_note + interval
+        score = 0
+
+        # 1. Ton Filtresi (Burada eksi puan veriyoruz ki sirada en sona gitsin)
+        if (candidate_note % 12) not in self.allowed_pitch_classes:
+            return -1000
+
+        if prev_cp is not None:
+            # Zit Yon (+3)
+            dir_cf = 1 if cf_note > prev_cf else (-1 if cf_note < prev_cf else 0)
+            dir_cp = 1 if candidate_note > prev_cp else (-1 if candidate_note < prev_cp else 0)
+            if dir_cf != 0 and dir_cp != 0 and dir_cf != dir_cp:
+                score += 3
+
+            # Adim Hareketi (+2)
+            step_size = abs(candidate_note - prev_cp)
+            if step_size <= 2: score += 2
+            elif step_size > 4: score -= 2
+
+        # Kusurlu Konsonans (+1)
+        if (interval % 12) in {3, 4, 8, 9}: score += 1
+
+        return score
+
+    def _ordered_intervals(self, idx, prev_cp):
+        """
+        idx pozisyonunda denenecek (bit, interval) ciftleri, heuristic sirasiyla.
+        Siralama sadece (cf nota sinifi, cf yonu, cf - onceki cp) degerlerine
+        bagli oldugu icin bir kez hesaplanip onbellekte tutulur.
+        """
+        self._ensure_masks()
         cf_note = self.cf[idx]
-        candidates = []
-        
-        possible_notes = list(range(self.min_interval, self.max_interval + 1))
-        
-        # --- HEURISTIC SIRALAMA ---
-        def heuristic_score(interval):
-            candidate_note = cf_note + interval
-            score = 0
-            
-            # 1. Ton Filtresi (Burada eksi puan veriyoruz ki sirada en sona gitsin)
-            if (candidate_note % 12) not in self.allowed_pitch_classes:
-                return -1000 
-            
-            if idx > 0:
-                prev_cp = current_melody[-1]
-                prev_cf = self.cf[idx-1]
-                
-                # Zit Yon (+3)
-                dir_cf = 1 if cf_note > prev_cf else (-1 if cf_note < prev_cf else 0)
-                dir_cp = 1 if candidate_note > prev_cp else (-1 if candidate_note < prev_cp else 0)
-                if dir_cf != 0 and dir_cp != 0 and dir_cf != dir_cp:
-                    score += 3
-                
-                # Adim Hareketi (+2)
-                step_size = abs(candidate_note - prev_cp)
-                if step_size <= 2: score += 2
-                elif step_size > 4: score -= 2
-
-            # Kusurlu Konsonans (+1)
-            if (interval % 12) in {3, 4, 8, 9}: score += 1
-            
-            return score
+        if idx == 0:
+            key = (cf_note % 12, None, None)
+            prev_cf = None
+        else:
+            prev_cf = self.cf[idx-1]
+            key = (cf_note % 12, (cf_note > prev_cf) - (cf_note < prev_cf), cf_note - prev_cp)
 
-        possible_notes.sort(key=heuristic_score, reverse=True)
+        order = self._order_cache.get(key)
+        if order is None:
+            possible_notes = list(range(self.min_interval, self.max_interval + 1))
+            possible_notes.sort(key=lambda interval: self._heuristic_score(interval, cf_note, prev_cf, prev_cp), reverse=True)
+            order = tuple((interval - self.min_interval, interval) for interval in possible_notes)
+            self._order_cache[key] = order
+        return order
 
-        for interval in possible_notes:
-            candidate_note = cf_note + interval
-            
-            # KESIN FILTRE: Ton disi notalari hic deneme
-            if (candidate_note % 12) not in self.allowed_pitch_classes:
-                continue
+    def _successors(self, idx, prev_cp):
+        """Onceki cp notasi prev_cp iken idx'e gecerli notalar (backtrack sirasiyla)."""
+        cf_note = self.cf[idx]
+        mask = self._candidate_mask(idx, prev_cp) & self._reachable_masks()[idx]
+        return [cf_note + interval for bit, interval in self._ordered_intervals(idx, prev_cp)
+                if (mask >> bit) & 1]
 
-            temp_cp = current_melody + [candidate_note]
+    def is_valid_transition(self, idx, cp_prev, cp_curr):
+        """
+        Hot path: cp_curr notasini liste kopyalamadan sadece (cf_prev, cf_curr,
+        cp_prev) uzerinden kontrol eder. Kriter aralik penceresi + ton filtresi
+        + hard kurallardir; get_valid_candidates'tan farkli olarak bitise
+        erisilebilirlik (reach) maskesi uygulanmaz; gecerli bir gecisin cozume
+        tamamlanabilecegi garanti degildir. solve_local tam bir melodide tek
+        notayi degistirirken iki komsusu sabit oldugu icin tam da bunu kullanir.
+        """
+        bit = cp_curr - self.cf[idx] - self.min_interval
+        if bit < 0 or bit > self.max_interval - self.min_interval: return False
+        return bool((self._candidate_mask(idx, cp_prev) >> bit) & 1)
 
-            if check_hard_constraints_verbose(self.rules, self.cf, temp_cp, idx, indent):
-                candidates.append(candidate_note)
-            
-        return candidates
+    def _shuffled_successors(self, idx, prev_cp):
+        """_successors ile ayni adaylar; esit heuristic puanlilar kendi aralarinda karisik."""
+        notes = self._successors(idx, prev_cp)
+        if len(notes) < 2: return notes
+        cf_note = self.cf[idx]
+        prev_cf = self.cf[idx-1] if idx > 0 else None
+        scores = [self._heuristic_score(note - cf_note, cf_note, prev_cf, prev_cp) for note in notes]
+        shuffled, start = [], 0
+        for end in range(1, len(notes) + 1):
+            if end == len(notes) or scores[end] != scores[start]:
+                group = notes[start:end]
+                self._tie_rng.shuffle(group)
+                shuffled += group
+                start = end
+        return shuffled
 
-    def backtrack(self, current_melody, depth=0):
+    def get_valid_candidates(self, idx, current_melody, indent):
+        prev_cp = current_melody[-1] if idx > 0 else None
+        if self._tie_rng is not None:
+            return self._shuffled_successors(idx, prev_cp)
+        return self._successors(idx, prev_cp)
+
+    # --- SURE / DUGUM BUTCESI ---
+    def _set_limits(self, deadline, node_budget):
+        self._limited = deadline is not None or node_budget is not None
+        self._deadline_at = None if deadline is None else time.monotonic() + deadline
+        self._node_budget = node_budget
+        self._stopped = False
+        self.search_nodes = 0
+        self.search_complete = True
+
+    def _should_stop(self):
+        """
+        Kooperatif iptal kontrolu (sadece sinir verildiyse cagrilir). Dugum
+        butcesi her dugumde, saat her 256 dugumde bir kontrol edilir.
+        """
+        self.search_nodes += 1
+        if self._node_budget is not None and self.search_nodes > self._node_budget:
+            self._stopped = True
+        elif self._deadline_at is not None and not (self.search_nodes & 255) and time.monotonic() >= self._deadline_at:
+            self._stopped = True
+        return self._stopped
+
+    def backtrack(self, current_melody, depth=0, partial_score=0):
+        """
+        Ozyinelemeli arama; puan nota eklendikce guncellenir (partial_score:
+        kesinlesmis 1..idx-2 pozisyonlarinin toplami), yaprak O(1) puanlanir.
+        """
         indent = "  " * depth 
         idx = len(current_melody)
         
-        if len(self.solutions) >= self.target_solutions: return
+        if self.num_solutions >= self.target_solutions: return
+        if self._limited and (self._stopped or self._should_stop()): return
+        stats = self.stats
+        if stats is not None and idx > stats.max_depth: stats.max_depth = idx
 
         if idx == len(self.cf):
-            score = calculate_total_score_verbose(self.rules, self.cf, current_melody)
-            self.solutions.append({'melody': list(current_melody), 'score': score})
+            score = partial_score
+            if idx >= 2:
+                score += calculate_position_score(self.rules, self.cf, idx - 1, current_melody[-2], current_melody[-1], None)
+            self._record_solution(current_melody, score)
             return 
 
+        # Adaylar reach maskesiyle kesildigi icin her aday bir bitise tamamlanabilir:
+        # cikmaz alt agac olusmaz, ayrica nogood kaydina gerek yoktur
         candidates = self.get_valid_candidates(idx, current_melody, indent)
-        if not candidates: return 
+        if stats is not None: self._count_expansion(idx, current_melody[-1] if idx > 0 else None)
 
         for note in candidates:
+            gained = 0
+            if idx >= 2:
+                gained = calculate_position_score(self.rules, self.cf, idx - 1, current_melody[-2], current_melody[-1], note)
             current_melody.append(note)
-            self.backtrack(current_melody, depth + 1)
-            if len(self.solutions) >= self.target_solutions: return
+            self.backtrack(current_melody, depth + 1, partial_score + gained)
+            if self.num_solutions >= self.target_solutions or self._stopped: return
             current_melody.pop() 
+            if stats is not None:
+                stats.backtracks_per_depth[idx] = stats.backtracks_per_depth.get(idx, 0) + 1
+
+    def _iter_leaves(self, prefix=()):
+        """
+        backtrack'in ozyinelemesiz hali: her derinlik icin bir aday iteratoru
+        tutan acik bir yigin kullanir. Ayni cozumleri ayni sirada bulur ama
+        Python'un recursion limitine takilmaz (binlerce notalik tam sarki cf'leri).
+        Puan, notalar eklendikce onek toplamlariyla tutulur; yapraklar O(1) puanlanir.
+        Her yaprakta (canli melodi listesi, puan) uretir; liste sonra degisir.
+        prefix verilirse sadece o onekle baslayan alt agac gezilir.
+        """
+        n = len(self.cf)
+        base = len(prefix)
+        if n == base:
+            yield list(prefix), calculate_total_score_verbose(self.rules, self.cf, list(prefix))
+            return
+
+        successors = self._successors if self._tie_rng is None else self._shuffled_successors
+        stats = self.stats
+        melody = list(prefix)
+        partial = [0] * min(base + 1, 3)  # partial[k]: ilk k nota icin kesinlesmis (1..k-2) puan
+        for k in range(3, base + 1):
+            partial.append(partial[-1] + calculate_position_score(self.rules, self.cf, k - 2, melody[k - 3], melody[k - 2], melody[k - 1]))
+        stack = [iter(successors(base, melody[-1] if base else None))]
+        if stats is not None: self._count_expansion(base, melody[-1] if base else None)
+
+        while stack:
+            if self._limited and self._should_stop(): return
+            idx = base + len(stack) - 1
+            candidates = stack[-1]
+            if len(melody) > idx:
+                melody.pop()
+                partial.pop()
+                if stats is not None:
+                    stats.backtracks_per_depth[idx] = stats.backtracks_per_depth.get(idx, 0) + 1
+
+            note = next(candidates, None)
+            if note is None:
+                stack.pop()
+                continue
+
+            gained = 0
+            if idx >= 2:
+                gained = calculate_position_score(self.rules, self.cf, idx - 1, melody[-2], melody[-1], note)
+            melody.append(note)
+            partial.append(partial[-1] + gained)
+            if stats is not None and idx + 1 > stats.max_depth: stats.max_depth = idx + 1
+
+            if idx == n - 1:
+                score = partial[-1]
+                if n >= 2:
+                    score += calculate_position_score(self.rules, self.cf, n - 1, melody[-2], melody[-1], None)
+                yield melody, score
+                continue
+
+            stack.append(iter(successors(idx + 1, note)))
+            if stats is not None: self._count_expansion(idx + 1, note)
+
+    def iter_solutions(self):
+        """
+        Tembel (lazy) cozum akisi: arama bir yapraga ulasir ulasmaz gecerli
+        melodiyi {'melody', 'score'} olarak uretir. Hicbir sey biriktirilmez ve
+        siralanmaz; cagiran istedigi an durabilir (ilk N cozum, canli render vb.).
+        Siralama backtrack ile aynidir.
+        """
+        for melody, score in self._iter_leaves():
+            yield {'melody': list(melody), 'score': score}
+
+    def backtrack_iterative(self, prefix=()):
+        """Ozyinelemesiz backtrack: cozumleri target_solutions'a kadar depoya yazar."""
+        if self.num_solutions >= self.target_solutions: return
+        for melody, score in self._iter_leaves(prefix):
+            self._record_solution(melody, score)
+            if self.num_solutions >= self.target_solutions: return
+
+    # --- YENIDEN BASLATMALI ARAMA ---
+    def solve_restarts(self, iterative=False):
+        """
+        Agir kuyruklu arama surelerine karsi yeniden baslatma: her kosu
+        restart_base_nodes * (Luby ya da geometrik carpan) dugumle sinirlidir.
+        Ilk kosu normal backtrack sirasini, sonrakiler esit heuristic puanli
+        adaylar arasinda tohumlu (restart_seed) rastgele sirayi kullanir. Cozum
+        deposu kosular boyunca korunur; bir kosu sinirina takilmadan bitince
+        (hedef doldu ya da agac bitti) arama tamamlanir. Dondurulen deger kosu
+        sayisidir.
+        """
+        deadline_at, user_budget, limited = self._deadline_at, self._node_budget, self._limited
+        rng = random.Random(self.restart_seed)
+        self._restart_seen = set()
+        runs = 0
+        try:
+            while True:
+                runs += 1
+                if self.restart_schedule == "luby":
+                    factor = _luby(runs)
+                else:
+                    factor = self.restart_growth ** (runs - 1)
+                budget = self.search_nodes + int(self.restart_base_nodes * factor)
+                if user_budget is not None: budget = min(budget, user_budget)
+                self._limited, self._node_budget, self._stopped = True, budget, False
+                self._tie_rng = None if runs == 1 else rng
+                if iterative:
+                    self.backtrack_iterative()
+                else:
+                    self.backtrack([])
+                if not self._stopped: break
+                # Kullanicinin suresi/butcesi bittiyse kesik olarak kalir
+                if deadline_at is not None and time.monotonic() >= deadline_at: break
+                if user_budget is not None and self.search_nodes >= user_budget: break
+        finally:
+            self._node_budget, self._limited = user_budget, limited
+            self._tie_rng = None
+            self._restart_seen = None
+        return runs
+
+    def _relaxed_bounds(self):
+        """
+        BnB icin admissible ust sinir: bound[i][b], cp[i]=b iken i..n-1
+        pozisyonlarindan alinabilecek puanin ust siniri (bound[0][b]: 1..n-1).
+        Durum (onceki, simdiki) cifti yerine sadece simdiki nota: i. pozisyonun
+        puaninda cp[i-1] serbest birakilip en iyisi alinir. Bu gevseme yuzunden
+        tablo optimumu vermez, sadece asamayacagi bir tavan verir; durum sayisi
+        pencere kadar oldugu icin tek geri gecis yeterlidir. Sure/dugum butcesi
+        tablo bitmeden dolarsa None doner.
+        """
+        n = len(self.cf)
+        reach = self._reachable_masks()
+        layer_notes = [[self.cf[i] + self.min_interval + bit for bit in _iter_bits(reach[i])] for i in range(n)]
+        bound = [None] * n
+        bound[n - 1] = {b: 0 for b in layer_notes[n - 1]}
+        limited = self._limited
+        for i in range(n - 1, 0, -1):
+            layer = {}
+            next_layer = bound[i + 1] if i + 1 < n else None
+            for a in layer_notes[i - 1]:
+                for b in self._successors(i, a):
+                    if limited and self._should_stop(): return None
+                    if next_layer is None:
+                        best = calculate_position_score(self.rules, self.cf, i, a, b, None)
+                    else:
+                        best = max(calculate_position_score(self.rules, self.cf, i, a, b, c) + next_layer[c]
+                                   for c in self._successors(i + 1, b))
+                    if b not in layer or best > layer[b]: layer[b] = best
+            bound[i] = layer
+        if n >= 2:
+            bound[0] = {a: max(bound[1][b] for b in self._successors(1, a)) for a in layer_notes[0]}
+        return bound
+
+    def branch_and_bound(self):
+        """
+        En iyi sinir once (best-first) branch-and-bound. Dugum: kesinlesmis
+        onek puani (1..idx-1 pozisyonlari) nota eklendikce guncellenir, oncelik
+        onek puani + kalan pozisyonlarin ust siniridir (_relaxed_bounds). Sinir
+        tutarli oldugu icin ilk tamamlanan melodi optimumdur; siniri ondan
+        yuksek olmayan dallar hic acilmaz. Gelecek sadece (idx, onceki cp, cp)
+        durumuna bagli oldugu icin ayni duruma daha dusuk puanla gelen dal da
+        budanir. Ozyinelemesizdir (yigin yerine oncelik kuyrugu). Sure/dugum
+        butcesi dolarsa o ana kadarki en iyi tam melodi (varsa) kalir.
+        """
+        n = len(self.cf)
+        if n == 0:
+            self.best_solution = {'melody': [], 'score': 0}
+            return
+
+        # Kuyruk ogesi: (-sinir, -idx, sira, onek puani, bitti_mi, dugum); dugum =
+        # (nota, ust dugum) bagli listesi. Esit sinirda derin dugum once acilir.
+        bounds = self._bounds
+        best_prefix = {}  # (idx, onceki cp, cp) -> o duruma ulasan en iyi onek puani
+        queue = []
+        for order, note in enumerate(self.get_valid_candidates(0, [], "")):
+            best_prefix[(0, None, note)] = 0
+            queue.append((-bounds[0][note], 0, order, 0, n == 1, (note, None)))
+        heapq.heapify(queue)
+        pushed = len(queue)
+        incumbent = None  # Kuyruga giren en iyi tam melodinin puani
+        incumbent_node = None
+        while queue:
+            if self._limited and self._should_stop():
+                if incumbent_node is not None:
+                    self.best_solution = {'melody': _unlink(incumbent_node), 'score': incumbent}
+                return
+            _, neg_idx, _, partial_score, finished, node = heapq.heappop(queue)
+            idx = -neg_idx
+            if finished:
+                self.best_solution = {'melody': _unlink(node), 'score': partial_score}
+                return
+            prev_cp = node[1][0] if node[1] is not None else None
+            if best_prefix.get((idx, prev_cp, node[0])) != partial_score: continue  # eskimis kayit
+            self.bnb_nodes += 1
+
+            note = node[0]
+            melody_tail = [prev_cp, note] if prev_cp is not None else [note]
+            for next_note in self.get_valid_candidates(idx + 1, melody_tail, ""):
+                gained = 0
+                if idx >= 1:
+                    gained = calculate_position_score(self.rules, self.cf, idx, prev_cp, note, next_note)
+                score = partial_score + gained
+                if idx + 1 == n - 1:
+                    score += calculate_position_score(self.rules, self.cf, n - 1, note, next_note, None)
+                    if incumbent is not None and score <= incumbent: continue
+                    incumbent, incumbent_node = score, (next_note, node)
+                    heapq.heappush(queue, (-score, -(idx + 1), pushed, score, True, incumbent_node))
+                    pushed += 1
+                    continue
+                limit = score + bounds[idx + 1][next_note]
+                if incumbent is not None and limit <= incumbent: continue
+                state = (idx + 1, note, next_note)
+                reached = best_prefix.get(state)
+                if reached is not None and score <= reached: continue
+                best_prefix[state] = score
+                heapq.heappush(queue, (-limit, -(idx + 1), pushed, score, False, (next_note, node)))
+                pushed += 1
+
+    def solve_bnb(self):
+        """
+        Branch-and-bound ile kesin optimum: puan solve_dp ile aynidir, esit
+        puanli melodiler arasindaki secim farkli olabilir (deterministiktir).
+        Sinir tam DP degil, ucuz bir gevseme oldugu icin optimum aramayla
+        bulunur; uzun cf'lerde kesin optimum icin daha hizli yol method="dp"dir.
+        """
+        self.best_solution = None
+        self.bnb_nodes = 0
+        if not self.is_feasible(): return None
+        self._bounds = self._relaxed_bounds() if self.cf else []
+        if self._bounds is None: return None
+        self.branch_and_bound()
+        return self.best_solution
+
+    def _split_prefixes(self, depth):
+        """
+        Arama agacini sig bir derinlikte boler: depth uzunlugundaki tum gecerli
+        onekler, backtrack sirasiyla (onek, alt agacindaki yaprak sayisi).
+        Yaprak sayisi sadece onekin son notasina bagli; _count_tables'tan okunur.
+        """
+        counts = self._count_tables()
+        prefixes = [[note] for note in self._successors(0, None)]
+        for idx in range(1, depth):
+            prefixes = [prefix + [note] for prefix in prefixes for note in self._successors(idx, prefix[-1])]
+        last = depth - 1
+        return [(prefix, counts[last][prefix[-1] - self.cf[last] - self.min_interval]) for prefix in prefixes]
+
+    def solve_parallel(self, workers=None, split_depth=1):
+        """
+        backtrack'in cok surecli hali. Agac ilk split_depth (1-2) notada bolunur,
+        her onekin alt agaci bir isci surece gider. Seri backtrack yapraklari
+        sirayla target_solutions'a kadar toplar; her onekin kac yaprak katacagi
+        onceden bilindigi icin her isciye tam o kadar butce verilir. Isci
+        depolari onek sirasiyla, bulunma sirasi kaydirilarak birlestirilir:
+        depo, num_solutions ve en iyi sonuc seri backtrack ile aynidir.
+        Sure siniri tum iscilere, dugum butcesi her alt agaca ayri uygulanir.
+        """
+        depth = max(1, min(split_depth, 2, len(self.cf)))
+        tasks = []
+        remaining = self.target_solutions
+        for prefix, leaves in self._split_prefixes(depth):
+            if remaining <= 0: break
+            budget = min(leaves, remaining)
+            tasks.append((prefix, budget))
+            remaining -= budget
+
+        config = (list(self.cf), self.key_root_name, self.mode, self.min_interval, self.max_interval,
+                  self.rules, self.top_k, self._open_end)
+        deadline = None if self._deadline_at is None else max(0.0, self._deadline_at - time.monotonic())
+        found = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_prefix_worker,
+                                 initargs=(config, (deadline, self._node_budget))) as pool:
+            for solutions, num_solutions, stopped, nodes in pool.map(_solve_prefix, tasks):
+                for score, neg_order, melody in solutions:
+                    entry = (score, neg_order - found, melody)
+                    if len(self.solutions) < self.top_k:
+                        heapq.heappush(self.solutions, entry)
+                    elif entry > self.solutions[0]:
+                        heapq.heapreplace(self.solutions, entry)
+                found += num_solutions
+                self.search_nodes += nodes
+                if stopped: self._stopped = True
+        self.num_solutions = found
+
+    def _count_tables(self):
+        """
+        counts[i][bit]: cp[i] = cf[i] + min_interval + bit secildiginde, i+1..n-1
+        icin hard kurallari saglayan devam sayisi. Durum sadece (idx, onceki cp)
+        oldugu icin tablo O(n * pencere^2) maske islemiyle dolar; Python int'leri
+        sayesinde milyarlarca cozumde de tasma olmaz.
+        """
+        n = len(self.cf)
+        width = self.max_interval - self.min_interval + 1
+        reach = self._reachable_masks()
+        counts = [None] * n
+        counts[n - 1] = [(reach[n - 1] >> bit) & 1 for bit in range(width)]
+        for i in range(n - 2, -1, -1):
+            row = [0] * width
+            next_row = counts[i + 1]
+            for bit in _iter_bits(reach[i]):
+                cp_note = self.cf[i] + self.min_interval + bit
+                mask = self._candidate_mask(i + 1, cp_note) & reach[i + 1]
+                row[bit] = sum(next_row[next_bit] for next_bit in _iter_bits(mask))
+            counts[i] = row
+        return counts
+
+    def count_solutions(self):
+        """Tum hard kurallari saglayan melodi sayisi (agac gezilmeden, DP ile)."""
+        if not self.cf: return 1
+        counts = self._count_tables()
+        mask = self._base_mask(0) & self._reachable_masks()[0]
+        return sum(counts[0][bit] for bit in _iter_bits(mask))
+
+    # --- RASTGELE ORNEKLEME ---
+    def _log_partition(self, temperature):
+        """
+        Softmax ornekleme icin log-bolus fonksiyonu: logz[i][(a, b)] =
+        log(sum exp(puan / temperature)) uzerinden cp[i-1]=a, cp[i]=b ile
+        baslayan tum gecerli devamlar. _dp_values ile ayni yapi, max yerine log-sum-exp.
+        """
+        n = len(self.cf)
+        reach = self._reachable_masks()
+        layer_notes = [[self.cf[i] + self.min_interval + bit for bit in _iter_bits(reach[i])] for i in range(n)]
+        logz = [None] * n
+        for i in range(n - 1, 0, -1):
+            layer = {}
+            for a in layer_notes[i - 1]:
+                for b in self._successors(i, a):
+                    if i == n - 1:
+                        layer[(a, b)] = calculate_position_score(self.rules, self.cf, i, a, b, None) / temperature
+                        continue
+                    terms = [calculate_position_score(self.rules, self.cf, i, a, b, c) / temperature + logz[i + 1][(b, c)]
+                             for c in self._successors(i + 1, b)]
+                    layer[(a, b)] = _log_sum_exp(terms)
+            logz[i] = layer
+        return logz
+
+    def sample_solutions(self, count=1, temperature=None, seed=None):
+        """
+        Gecerli kontrpuanlardan rastgele ornek ceker. temperature=None ise tum
+        cozumler esit olasilikli (uniform); aksi halde olasilik exp(puan / temperature)
+        ile orantili (softmax). Tek seferlik DP'den sonra her ornek O(n).
+        seed ile sonuclar tekrarlanabilir. Cozum yoksa bos liste doner.
+        """
+        rng = random.Random(seed)
+        n = len(self.cf)
+        if n == 0: return [{'melody': [], 'score': 0} for _ in range(count)]
+        if not self.is_feasible(): return []
+
+        low = self.min_interval
+        if temperature is None:
+            counts = self._count_tables()
+            def weights(i, prev_cp, notes):
+                return [counts[i][note - self.cf[i] - low] for note in notes]
+        else:
+            logz = self._log_partition(temperature) if n > 1 else None
+            def weights(i, prev_cp, notes):
+                if n == 1: return [1.0] * len(notes)
+                if i == 0:
+                    # cp[0]'in agirligi, tum (cp[0], cp[1]) ciftlerinin toplami
+                    logs = [_log_sum_exp([logz[1][(a, b)] for b in self._successors(1, a)]) for a in notes]
+                else:
+                    before = prev_cp[-2] if i >= 2 else None
+                    logs = [logz[i][(prev_cp[-1], c)] +
+                            (calculate_position_score(self.rules, self.cf, i - 1, before, prev_cp[-1], c) / temperature if i >= 2 else 0)
+                            for c in notes]
+                top = max(logs)
+                return [math.exp(value - top) for value in logs]
+
+        samples = []
+        for _ in range(count):
+            melody = []
+            for i in range(n):
+                notes = self._successors(i, melody[-1] if i > 0 else None)
+                melody.append(_weighted_choice(rng, notes, weights(i, melody, notes)))
+            samples.append({'melody': melody, 'score': calculate_total_score_verbose(self.rules, self.cf, melody)})
+        return samples
+
+    def _dp_values(self):
+        """
+        Geriye dogru DP tablolari. value[i][(a, b)]: cp[i-1]=a, cp[i]=b iken
+        i..n-1 pozisyonlarindan alinabilecek en iyi puan. value[0][a]: cp[0]=a
+        iken tum melodinin en iyi puani. Gecerli devami olmayan durumlar
+        tabloda yer almaz; hicbir cozum yoksa ya da sure/dugum butcesi
+        (her durum bir dugum) tablo bitmeden dolarsa None doner.
+        """
+        n = len(self.cf)
+        first_notes = self._successors(0, None)
+        if not first_notes: return None
+        if n == 1: return [{a: 0 for a in first_notes}]
+
+        succ_cache = {}
+        def successors(i, prev_cp):
+            key = (i, prev_cp)
+            if key not in succ_cache:
+                succ_cache[key] = self._successors(i, prev_cp)
+            return succ_cache[key]
+
+        # Her pozisyonda gorulebilecek notalar (ton + aralik penceresi)
+        layer_notes = [
+            [cf_note + interval for interval in range(self.min_interval, self.max_interval + 1)
+             if ((cf_note + interval) % 12) in self.allowed_pitch_classes]
+            for cf_note in self.cf
+        ]
+
+        limited = self._limited
+        value = [None] * n
+        for i in range(n - 1, 0, -1):
+            layer = {}
+            next_layer = value[i + 1] if i + 1 < n else None
+            for a in layer_notes[i - 1]:
+                for b in successors(i, a):
+                    if limited and self._should_stop(): return None
+                    if next_layer is None:
+                        layer[(a, b)] = calculate_position_score(self.rules, self.cf, i, a, b, None)
+                        continue
+                    best = None
+                    for c in successors(i + 1, b):
+                        rest = next_layer.get((b, c))
+                        if rest is None: continue
+                        total = calculate_position_score(self.rules, self.cf, i, a, b, c) + rest
+                        if best is None or total > best: best = total
+                    if best is not None:
+                        layer[(a, b)] = best
+            value[i] = layer
+
+        first_layer = {}
+        for a in first_notes:
+            for b in successors(1, a):
+                v = value[1].get((a, b))
+                if v is not None and v > first_layer.get(a, v - 1):
+                    first_layer[a] = v
+        if not first_layer: return None
+        value[0] = first_layer
+        return value
+
+    def solve_dp(self):
+        """
+        Kesin (exact) optimizasyon: Viterbi tarzi dinamik programlama.
+        Hard kurallar (onceki, simdiki) ciftine, soft puan ise (onceki, simdiki,
+        sonraki) uclusune bagli oldugu icin durum = (idx, onceki cp, simdiki cp).
+        Esit puanlarda backtrack'in ilk buldugu melodi secilir; yani sonuc,
+        limitsiz backtrack + siralama ile birebir aynidir.
+        """
+        n = len(self.cf)
+        if n == 0: return {'melody': [], 'score': 0}
+        value = self._dp_values()
+        if value is None: return None
+
+        best_score = max(value[0].values())
+        first = next(a for a in self._successors(0, None) if value[0].get(a) == best_score)
+        return {'melody': self._dp_extend(value, [first]), 'score': best_score}
+
+    def _dp_extend(self, value, melody):
+        """
+        Ileri yonde geri izleme: bos olmayan melody onekini value tablolarina
+        gore, esitlikte backtrack sirasindaki ilk optimumla sona kadar tamamlar.
+        """
+        for i in range(len(melody), len(self.cf)):
+            prev_cp = melody[-2] if i >= 2 else None
+            for c in self._successors(i, melody[-1]):
+                rest = value[i].get((melody[-1], c))
+                if rest is None: continue
+                gained = calculate_position_score(self.rules, self.cf, i - 1, prev_cp, melody[-1], c) if i >= 2 else 0
+                target = value[i - 1][(prev_cp, melody[-1])] if i >= 2 else value[0][melody[0]]
+                if gained + rest == target:
+                    melody.append(c)
+                    break
+        return melody
+
+    # --- ISIN (BEAM) ARAMASI ---
+    def solve_beam(self, width=64):
+        """
+        Kismi melodileri her adimda bir nota uzatir, kesinlesen puanla siralar
+        ve en iyi width tanesini tutar. Kalan puan sadece son iki notaya bagli
+        oldugu icin ayni (onceki, simdiki) ciftinden sadece en iyisi kalir;
+        width bu cift sayisini asarsa sonuc DP'nin kesin optimumudur.
+        Sure O(n * width * aralik penceresi). Son isin puana gore sirali
+        cozum listesi olarak doner (en iyisi basta); cozum yoksa ya da sure/dugum
+        butcesi (her genisletilen kisim bir dugum) son isindan once dolarsa bos liste.
+        """
+        n = len(self.cf)
+        if n == 0: return [{'melody': [], 'score': 0}]
+        if not self.is_feasible(): return []
+
+        # beam: (puan, onceki nota, nota); layers[i]: (nota, ebeveyn indeksi)
+        # Adaylar erisilebilirlik maskesinden gectigi icin her kisim tamamlanabilir.
+        first = self._successors(0, None)[:width]
+        beam = [(0, None, note) for note in first]
+        layers = [[(note, None) for note in first]]
+        for idx in range(1, n):
+            best_by_state = {}
+            for parent, (score, prev_cp, cp) in enumerate(beam):
+                if self._limited and self._should_stop(): return []
+                for note in self._successors(idx, cp):
+                    total = score
+                    if idx >= 2:
+                        total += calculate_position_score(self.rules, self.cf, idx - 1, prev_cp, cp, note)
+                    if idx == n - 1:
+                        total += calculate_position_score(self.rules, self.cf, idx, cp, note, None)
+                    state = (cp, note)
+                    if state not in best_by_state or total > best_by_state[state][0]:
+                        best_by_state[state] = (total, parent)
+            kept = heapq.nlargest(width, best_by_state.items(), key=lambda item: item[1][0])
+            beam = [(total, cp, note) for (cp, note), (total, _) in kept]
+            layers.append([(note, parent) for (_, note), (_, parent) in kept])
+
+        alternatives = []
+        for k, (score, _, _) in enumerate(beam):
+            melody = []
+            for layer in reversed(layers):
+                note, parent = layer[k]
+                melody.append(note)
+                k = parent
+            alternatives.append({'melody': melody[::-1], 'score': score})
+        return alternatives
+
+    # --- YEREL ARAMA ---
+    def solve_local(self, iterations=10000):
+        """
+        Cok uzun cf'ler icin yerel iyilestirme (simulated annealing): backtrack'in
+        ilk buldugu gecerli melodiden baslar. Her hamle rastgele bir pozisyona
+        penceredeki rastgele bir notayi dener; sadece komsu iki gecis
+        (i-1 -> i, i -> i+1) kontrol edilir ve puan farki i-1..i+1
+        pozisyonlarindan hesaplanir, yani her hamle O(1). Sicaklik
+        local_start_temperature'dan local_end_temperature'a geometrik olarak
+        duser; local_seed ile tekrarlanabilir. Gorulen en iyi melodi doner.
+        """
+        n = len(self.cf)
+        self.local_moves = 0
+        if n == 0:
+            self.local_start_score = 0
+            return {'melody': [], 'score': 0}
+        if not self.is_feasible(): return None
+        first = next(self._iter_leaves(), None)
+        if first is None: return None
+        melody, score = list(first[0]), first[1]
+        self.local_start_score = score
+
+        rules, cf = self.rules, self.cf
+        def position_score(j):
+            if j < 1 or j >= n: return 0
+            return calculate_position_score(rules, cf, j, melody[j-1], melody[j], melody[j+1] if j + 1 < n else None)
+
+        rng = random.Random(self.local_seed)
+        width = self.max_interval - self.min_interval + 1
+        start_t, end_t = self.local_start_temperature, self.local_end_temperature
+        best_score, best = score, array('h', melody)
+        for step in range(iterations):
+            if self._limited and self._should_stop(): break
+            i = rng.randrange(n)
+            note = cf[i] + self.min_interval + rng.randrange(width)
+            old = melody[i]
+            if note == old: continue
+            if not self.is_valid_transition(i, melody[i-1] if i > 0 else None, note): continue
+            if i + 1 < n and not self.is_valid_transition(i + 1, note, melody[i+1]): continue
+
+            before = position_score(i - 1) + position_score(i) + position_score(i + 1)
+            melody[i] = note
+            delta = position_score(i - 1) + position_score(i) + position_score(i + 1) - before
+            temperature = start_t * (end_t / start_t) ** (step / iterations)
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                score += delta
+                self.local_moves += 1
+                if score > best_score:
+                    best_score, best = score, array('h', melody)
+            else:
+                melody[i] = old
+        return {'melody': list(best), 'score': best_score}
+
+    # --- AKIS (STREAMING) COZUMU ---
+    def stream_solve(self, cf_notes, window=32, overlap=16):
+        """
+        cf notalarini bir iteratorden okuyup kontrpuan notalarini sirayla uretir
+        (generator). Kayan pencere DP ile cozulur; ilk (window - overlap) nota
+        kesinlesip disari verilir, kalan overlap bir sonraki pencerede yeniden
+        cozulur. Sonraki pencere son iki kesinlesmis notayi sabit onek olarak
+        alir, boylece (onceki, simdiki) hard kurallari ve sinirdaki soft puan
+        korunur. Adim cift tutulur ki vurgulu zamanlar (cift indeks) kaymasin;
+        bitis kadansi sadece akisin gercek sonunda uygulanir. Bellek O(window).
+        """
+        step = max(2, (window - overlap) // 2 * 2)
+        window = max(window, step)
+        window_solver = UniversalBaroqueSolver([], self.key_root_name, self.mode)
+        window_solver.rules = self.rules
+        window_solver.min_interval, window_solver.max_interval = self.min_interval, self.max_interval
+
+        end = object()
+        notes = iter(cf_notes)
+        buffer = []
+        context_cf, context_cp = [], []
+        while True:
+            # Bir fazla nota okunur: akisin bitip bitmedigi boylece bilinir
+            while len(buffer) <= window:
+                note = next(notes, end)
+                if note is end: break
+                buffer.append(note)
+            final = len(buffer) <= window
+            if not buffer: return
+
+            window_solver.cf = context_cf + buffer[:window]
+            window_solver._open_end = not final
+            value = window_solver._dp_values()
+            prefix = tuple(context_cp)
+            if value is None or (prefix and prefix not in value[1]):
+                raise ValueError("Akista gecerli devam bulunamadi (window/overlap buyutulmeli)")
+            if prefix:
+                melody = window_solver._dp_extend(value, list(prefix))[len(prefix):]
+            else:
+                best_score = max(value[0].values())
+                first = next(a for a in window_solver._successors(0, None) if value[0].get(a) == best_score)
+                melody = window_solver._dp_extend(value, [first])
+
+            if final:
+                yield from melody
+                return
+            yield from melody[:step]
+            committed_cf = (context_cf + buffer)[:len(context_cf) + step]
+            context_cf, context_cp = committed_cf[-2:], (context_cp + melody[:step])[-2:]
+            del buffer[:step]
+
+    def solve(self, method="backtrack", workers=None, split_depth=1, width=64, deadline=None, node_budget=None,
+              stats=False, iterations=10000):
+        """
+        deadline (saniye) ve/veya node_budget verilirse arama kooperatif olarak
+        kesilir ve o ana kadarki en iyi sonuc doner; sonuctaki 'complete' alani
+        aramanin bitip bitmedigini soyler. Sinir ilk cozumden once dolarsa (ya da
+        dp/beam gibi sonucu en sonda cikan bir yontemi keserse) None yerine
+        {'melody': None, 'score': None, 'complete': False} doner. Dugum dp'de bir DP
+        durumu, beam'de genisletilen kisim, bnb'de sinir tablosu durumu ya da
+        kuyruktan cikan dugumdur.
+        Kesin optimum icin en hizli yontem "dp"dir; "bnb" ayni puani gevsek bir
+        ust sinirla arama yaparak bulur.
+        method="parallel" backtrack'i ilk split_depth (1-2) notada bolup workers
+        surece dagitir; sonuc ve cozum deposu seri backtrack ile aynidir.
+        stats=True ise SearchStats toplanir: sonucta 'stats' alani ve self.stats.
+        Dugum/aday/red sayilari backtrack ailesinde, bnb'de sadece dugum sayisi
+        tutulur; tutulmayan sayaclar None'dir.
+        """
+        self._log(f"[>] Barok Kontrpuan Arayisi Basliyor ({self.key_root_name} {self.mode})...")
+        started = time.perf_counter()
+        self._set_limits(deadline, node_budget)
+        self.bnb_nodes = 0  # Onceki bir solve'un sayisi kalmasin (orn. onbellekten gelen bnb)
+        self.stats = SearchStats() if stats else None
+        if self.cache is None:
+            result = self._run_search(method, workers, split_depth, width, iterations)
+        else:
+            result = self._cached_search(method, workers, split_depth, width, iterations)
+        self.search_complete = not self._stopped
+        if result is None and self._stopped:
+            result = {'melody': None, 'score': None}  # Cozumsuz degil: arama yarida kaldi
+        if result is not None and self._limited:
+            result['complete'] = self.search_complete
+        self._limited = False  # Sinirlar sadece bu cagri icin; iter_solutions etkilenmez
+        if self.stats is not None:
+            self.stats.total_time = time.perf_counter() - self.stats._started
+            self.stats.hc_order = list(self.hc_order)
+            self.stats.untrack(_TRACKED_COUNTERS.get(method, ()))
+            if result is not None:
+                result['stats'] = self.stats
+        if self.log_timing:
+            elapsed = time.perf_counter() - started
+            logger.info("solve %s: %d nota, %.4f sn", method, len(self.cf), elapsed,
+                        extra={'solve_method': method, 'cf_length': len(self.cf), 'solve_time': elapsed,
+                               'complete': self.search_complete, 'found': result is not None})
+        return result
+
+    def _cache_method(self, method, width=64, iterations=10000):
+        """
+        Onbellek anahtarindaki yontem etiketi; tohumsuz restart/local gibi
+        tekrarlanamayan aramalar icin None (saklanmaz).
+        """
+        # Beam sonucu genislige, restart sonucu ayarlara ve tohuma bagli; anahtara eklenir
+        if method == "beam":
+            return f"beam:{width}"
+        if method == "parallel":
+            return "backtrack"  # Sonuc seri backtrack ile birebir ayni
+        if method == "restart":
+            if self.restart_seed is None: return None
+            return (f"restart:{self.restart_schedule}:{self.restart_base_nodes}:"
+                    f"{self.restart_growth}:{self.restart_seed}")
+        if method == "local":
+            if self.local_seed is None: return None
+            return (f"local:{iterations}:{self.local_start_temperature}:"
+                    f"{self.local_end_temperature}:{self.local_seed}")
+        return method
+
+    def _cached_search(self, method, workers, split_depth, width, iterations):
+        cache_method = self._cache_method(method, width, iterations)
+        if cache_method is None:
+            return self._run_search(method, workers, split_depth, width, iterations)
+        found, cached = self.cache.lookup(self, cache_method)
+        if found:
+            self._log("[i] Onbellekten alindi.")
+            if self.stats is not None: self.stats.untrack()  # Arama yapilmadi
+            self._reset_solutions()
+            if cached is None:
+                self._log_no_solution()
+                return None
+            self._record_solution(cached['melody'], cached['score'])
+            self._log(f"[*] EN IYI SONUC (Puan: {cached['score']})")
+            return {'melody': list(cached['melody']), 'score': cached['score']}
+
+        result = self._run_search(method, workers, split_depth, width, iterations)
+        # Yarida kesilen aramanin sonucu kesin degildir, saklanmaz
+        if not self._stopped:
+            self.cache.store(self, cache_method, result)
+        return result
 
-    def solve(self):
-        print(f"[>] Barok Kontrpuan Arayisi Basliyor ({self.key_root_name} {self.mode})...")
-        self.backtrack([])
+    def _log_no_solution(self):
+        if self._stopped:
+            self._log(f"[!] Sure/dugum butcesi ilk cozumden once doldu ({self.search_nodes} dugum); "
+                      f"cozum olup olmadigi bilinmiyor.", logging.WARNING)
+        else:
+            self._log("[!] Hicbir gecerli cozum bulunamadi.", logging.WARNING)
+
+    def _run_search(self, method, workers=None, split_depth=1, width=64, iterations=10000):
+        if method == "local":
+            best = self.solve_local(iterations)
+            if best is None:
+                self._log_no_solution()
+                return None
+            self._reset_solutions()
+            self._record_solution(best['melody'], best['score'])
+            self._log(f"\n[OK] Yerel Arama Tamamlandi. ({self.local_moves}/{iterations} hamle kabul, "
+                      f"baslangic puani {self.local_start_score})")
+            self._log(f"[*] EN IYI SONUC (Puan: {best['score']})")
+            return best
+        if method == "beam":
+            alternatives = self.solve_beam(width)
+            if not alternatives:
+                self._log_no_solution()
+                return None
+            # Son isin alternatif cozumler olarak depoya (siralamasi korunarak)
+            self._reset_solutions()
+            for alternative in alternatives:
+                self._record_solution(alternative['melody'], alternative['score'])
+            best = alternatives[0]
+            self._log(f"\n[OK] Beam Aramasi Tamamlandi. (Genislik {width}, {len(alternatives)} alternatif)")
+            self._log(f"[*] EN IYI SONUC (Puan: {best['score']})")
+            return {'melody': list(best['melody']), 'score': best['score']}
+        if method in ("dp", "bnb"):
+            best = self.solve_dp() if method == "dp" else self.solve_bnb()
+            if method == "bnb" and self.stats is not None:
+                self.stats.nodes_expanded = self.bnb_nodes
+            if best is None:
+                self._log_no_solution()
+                return None
+            self._reset_solutions()
+            self._record_solution(best['melody'], best['score'])
+            if method == "dp":
+                self._log(f"\n[OK] DP Tamamlandi. (Kesin optimum)")
+            else:
+                self._log(f"\n[OK] Branch-and-Bound {'Kesildi' if self._stopped else 'Tamamlandi'}. "
+                          f"({self.bnb_nodes} dugum)")
+            self._log(f"[*] EN IYI SONUC (Puan: {best['score']})")
+            return best
+        if method not in ("backtrack", "iterative", "restart", "parallel"):
+            raise ValueError(f"Bilinmeyen yontem: {method}")
+        # Cok uzun cf'lerde ozyinelemeli backtrack recursion limitini asar
+        too_deep = len(self.cf) + 100 > sys.getrecursionlimit()
+        if method == "backtrack" and too_deep:
+            method = "iterative"
+
+        self._reset_solutions()
+        if not self.is_feasible():
+            self._log("[!] Hicbir gecerli cozum bulunamadi. (Bitise ulasan yol yok)", logging.WARNING)
+            return None
+        if method == "restart":
+            runs = self.solve_restarts(iterative=too_deep)
+            self._log(f"[i] {runs} kosu ({self.restart_schedule}, {self.search_nodes} dugum)")
+        elif method == "iterative":
+            self.backtrack_iterative()
+        elif method == "parallel" and self.cf and workers != 1:
+            self.solve_parallel(workers, split_depth)
+        elif too_deep:
+            self.backtrack_iterative()
+        else:
+            self.backtrack([])
+        if self._stopped:
+            self._log(f"[!] Sure/dugum butcesi doldu, arama {self.search_nodes} dugumde kesildi.", logging.WARNING)
         
         if not self.solutions:
-            print("[!] Hicbir gecerli cozum bulunamadi.")
+            self._log_no_solution()
             return None
             
-        self.solutions.sort(key=lambda x: x['score'], reverse=True)
-        best = self.solutions[0]
-        print(f"\n[OK] Arama Tamamlandi. ({len(self.solutions)} aday)")
-        print(f"[*] EN IYI SONUC (Puan: {best['score']})")
+        score, _, melody = max(self.solutions)
+        best = {'melody': list(melody), 'score': score}
+        self._log(f"\n[OK] Arama {'Kesildi' if self._stopped else 'Tamamlandi'}. ({self.num_solutions} aday)")
+        self._log(f"[*] EN IYI SONUC (Puan: {best['score']})")
         return best
 
+# --- COZUM ONBELLEGI ---
+_SOURCE_FINGERPRINTS = {}
+
+def rules_fingerprint(rules):
+    """
+    Kurallarin surum parmak izi: kural sinifinin (ve ust siniflarinin), kontrol
+    fonksiyonlarinin ve aday siralamasinin kaynak kodu + kural nesnesinin
+    verisi (konsonans kumeleri vb.). Kurallar degisince onbellek kendiliginden gecersiz olur.
+    """
+    rules_type = type(rules)
+    source_hash = _SOURCE_FINGERPRINTS.get(rules_type)
+    if source_hash is None:
+        parts = [cls for cls in rules_type.__mro__ if cls is not object]
+        parts += [check_hard_transition, calculate_position_score, UniversalBaroqueSolver._heuristic_score]
+        digest = hashlib.sha1()
+        for part in parts:
+            try:
+                digest.update(inspect.getsource(part).encode())
+            except (OSError, TypeError):
+                digest.update(part.__qualname__.encode())
+        source_hash = digest.hexdigest()
+        _SOURCE_FINGERPRINTS[rules_type] = source_hash
+    state = repr(sorted((name, sorted(value) if isinstance(value, set) else value)
+                        for name, value in vars(rules).items()))
+    return hashlib.sha1((source_hash + state).encode()).hexdigest()
+
+class SolutionCache:
+    """
+    Icerik adresli cozum onbellegi. Anahtar: (kanonik cf, skala formulu, aralik
+    penceresi, target_solutions, yontem, kural surumu). Her zaman bellekte tutulur;
+    path verilirse SQLite dosyasina da yazilir, boylece tekrar eden bolumler
+    ve tekrar eden calistirmalar yeniden cozulmez. Sadece en iyi sonuc saklanir.
+    Anahtar transpozisyondan bagimsizdir: baska ton/oktavdaki ayni motif ayni
+    kaydi bulur, sonuc lookup() icinde geri transpoze edilir.
+    """
+    def __init__(self, path=None):
+        self.memory = {}
+        self.path = path
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, result TEXT)")
+            self._db.commit()
+
+    @staticmethod
+    def canonical_form(solver):
+        """
+        (kanonik cf, skala formulu, kaydirma). cf, ilk notasi kok sesin 0..11
+        uzerine dusecek sekilde kaydirilir; ton, koke gore nota siniflari olarak
+        yazilir. Kurallar ve aday sirasi sadece araliklara baktigi icin kanonik
+        cf'nin cozumu + kaydirma, asil cf'nin cozumudur (esitlik secimi dahil).
+        """
+        root = NOTE_MAP[solver.key_root_name.upper()]
+        shift = solver.cf[0] - ((solver.cf[0] - root) % 12) if solver.cf else root
+        scale = sorted((pitch_class - root) % 12 for pitch_class in solver.allowed_pitch_classes)
+        return [note - shift for note in solver.cf], scale, shift
+
+    def make_key(self, solver, method):
+        canonical_cf, scale, _ = self.canonical_form(solver)
+        payload = json.dumps([
+            canonical_cf, scale,
+            solver.min_interval, solver.max_interval, solver.target_solutions,
+            method, rules_fingerprint(solver.rules),
+        ])
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def lookup(self, solver, method):
+        """Solver'in kendi tonuna transpoze edilmis (bulundu_mu, sonuc)."""
+        found, result = self.get(self.make_key(solver, method))
+        if result is not None:
+            shift = self.canonical_form(solver)[2]
+            result = {'melody': [note + shift for note in result['melody']], 'score': result['score']}
+        return found, result
+
+    def store(self, solver, method, result):
+        """Sonucu kanonik (transpoze edilmis) bicimde saklar."""
+        if result is not None:
+            shift = self.canonical_form(solver)[2]
+            result = {'melody': [note - shift for note in result['melody']], 'score': result['score']}
+        self.put(self.make_key(solver, method), result)
+
+    def get(self, key):
+        """(bulundu_mu, sonuc) dondurur; cozumsuz bolumler icin sonuc None'dir."""
+        if key in self.memory:
+            return True, self.memory[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT result FROM solutions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                result = json.loads(row[0])
+                self.memory[key] = result
+                return True, result
+        return False, None
+
+    def put(self, key, result):
+        if result is not None:
+            result = {'melody': list(result['melody']), 'score': result['score']}
+        self.memory[key] = result
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO solutions (key, result) VALUES (?, ?)", (key, json.dumps(result)))
+            self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+# --- PARALEL BOLUM COZUMU ---
+def _solve_section(task):
+    """Isci surecte tek bir bolumu cozer (ProcessPoolExecutor icin modul seviyesinde)."""
+    section, key_root_name, mode, target_solutions, method = task
+    solver = UniversalBaroqueSolver(section, key_root_name=key_root_name, mode=mode)
+    solver.target_solutions = target_solutions
+    return solver.solve(method)
+
+def solve_sections(sections, key_root_name='C', mode='major', target_solutions=1000,
+                   method="backtrack", workers=1, cache=None):
+    """
+    Bagimsiz bolumleri cozer ve sonuclari bolum sirasiyla dondurur (cozumsuz
+    bolum icin None). Ayni icerikli bolumler bir kez cozulur. workers > 1 ise
+    bolumler ProcessPoolExecutor ile dagitilir; sure en yavas bolume yaklasir.
+    Tek bir uzun cf'nin backtrack aramasini cekirdeklere bolmek icin
+    solver.solve(method="parallel") kullanilir.
+    Onbellege sadece ana surec dokunur: isabetler iscilere gitmez, iscilerin
+    sonuclari donuste ana surecin onbellegine (bellek ve SQLite) yazilir.
+    """
+    unique = list(dict.fromkeys(tuple(section) for section in sections))
+    solved = {}
+    if workers > 1 and len(unique) > 1:
+        pending = []
+        for section in unique:
+            solver = UniversalBaroqueSolver(list(section), key_root_name=key_root_name, mode=mode)
+            solver.target_solutions = target_solutions
+            solver.cache = cache
+            cache_method = solver._cache_method(method) if cache is not None else None
+            if cache_method is not None and cache.lookup(solver, cache_method)[0]:
+                solved[section] = solver.solve(method)
+            else:
+                pending.append((section, solver, cache_method))
+        tasks = [(list(section), key_root_name, mode, target_solutions, method) for section, _, _ in pending]
+        if tasks:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for (section, solver, cache_method), result in zip(pending, pool.map(_solve_section, tasks)):
+                    solved[section] = result
+                    if cache_method is not None:
+                        cache.store(solver, cache_method, result)
+    else:
+        for section in unique:
+            solver = UniversalBaroqueSolver(list(section), key_root_name=key_root_name, mode=mode)
+            solver.target_solutions = target_solutions
+            solver.cache = cache
+            solved[section] = solver.solve(method)
+
+    results = []
+    for section in sections:
+        result = solved[tuple(section)]
+        results.append(None if result is None else {'melody': list(result['melody']), 'score': result['score']})
+    return results
+
+# --- TOPLU DP (NUMPY) ---
+def _mask_to_bits(mask, width):
+    return ((mask >> np.arange(width)) & 1).astype(bool)
+
+def solve_batch_dp(cantus_firmi, keys=('C', 'major'), min_interval=0, max_interval=16, chunk_size=512):
+    """
+    Bircok cf'yi tek seferde kesin DP ile cozer. Hard kural gecis tablolari
+    NumPy tensorlerine derlenir, ayni uzunluktaki cf'ler chunk_size'lik
+    gruplar halinde dizi islemleriyle cozulur. Sonuclar her cf icin
+    solve(method="dp") ile birebir aynidir (esitlikte heuristic sirasi dahil);
+    cozumsuz cf icin None doner. keys: tek bir (ton, mod) ya da cf basina liste.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("solve_batch_dp icin numpy gerekli (pip install numpy)")
+    cantus_firmi = [list(cf) for cf in cantus_firmi]
+    if len(keys) == 2 and isinstance(keys[0], str):
+        keys = [tuple(keys)] * len(cantus_firmi)
+    if len(keys) != len(cantus_firmi):
+        raise ValueError("keys, cantus_firmi ile ayni uzunlukta olmali")
+
+    width = max_interval - min_interval + 1
+    offsets = min_interval + np.arange(width)
+    key_ids = {}
+    templates = []
+    for key in keys:
+        key = tuple(key)
+        if key not in key_ids:
+            key_ids[key] = len(templates)
+            template = UniversalBaroqueSolver([], key_root_name=key[0], mode=key[1])
+            template.min_interval, template.max_interval = min_interval, max_interval
+            template._ensure_masks()
+            templates.append(template)
+    rules = templates[0].rules
+    scale_bits = np.array([[_mask_to_bits(mask, width) for mask in t._scale_masks] for t in templates])
+    strong_bits = _mask_to_bits(templates[0]._strong_mask, width)
+    final_bits = _mask_to_bits(templates[0]._final_mask, width)
+
+    # Gecis maskeleri tondan bagimsizdir: (cf hareketi) -> (onceki bit, bit) tablosu
+    motion_tables = {}
+    def transition_table(cf_motion):
+        table = motion_tables.get(cf_motion)
+        if table is None:
+            t = templates[0]
+            table = np.array([_mask_to_bits(t._transition_masks.get((cf_motion, prev_interval))
+                                            or t._compile_transition_mask(cf_motion, prev_interval), width)
+                              for prev_interval in range(min_interval, max_interval + 1)])
+            motion_tables[cf_motion] = table
+        return table
+
+    # Backtrack sirasi: bit -> sira numarasi (kucuk olan once denenir). Sira
+    # sadece (ton, cf nota sinifi, cf yonu, cf - onceki cp) degerlerine baglidir.
+    rank_tables = {}
+    def rank_table(key_id, pitch_class, direction, diff):
+        ranks = rank_tables.get((key_id, pitch_class, direction, diff))
+        if ranks is None:
+            if direction is None:
+                args = (pitch_class, None, None)
+            else:
+                args = (pitch_class, pitch_class - direction, pitch_class - diff)
+            heuristic = templates[key_id]._heuristic_score
+            order = sorted(range(min_interval, max_interval + 1),
+                           key=lambda interval: heuristic(interval, *args), reverse=True)
+            ranks = np.empty(width, dtype=np.int64)
+            ranks[[interval - min_interval for interval in order]] = np.arange(width)
+            rank_tables[(key_id, pitch_class, direction, diff)] = ranks
+        return ranks
+
+    def first_optimum(candidates, key_col, cf_col, prev_cf_col=None, prev_cp_col=None):
+        if prev_cp_col is None:
+            order_keys = np.stack([key_col, cf_col % 12], axis=1)
+        else:
+            order_keys = np.stack([key_col, cf_col % 12, np.sign(cf_col - prev_cf_col), cf_col - prev_cp_col], axis=1)
+        unique, inverse = np.unique(order_keys, axis=0, return_inverse=True)
+        tables = np.array([rank_table(int(row[0]), int(row[1]), *((None, None) if len(row) == 2 else map(int, row[2:])))
+                           for row in unique])
+        ranks = tables[inverse.reshape(-1)]
+        return np.argmin(np.where(candidates, ranks, width), axis=1)
+
+    # Soft puan sadece cf hareketlerine ve araliklara baglidir:
+    # (vurgu, cf[i]-cf[i-1], cf[i+1]-cf[i]) -> (sonraki bit, onceki bit, bit) tablosu.
+    # Sonraki nota en distaki eksende: max indirgemesi bitisik bloklar uzerinde calisir.
+    score_tables = {}
+    def score_table(is_strong, cf_motion, next_motion):
+        table = score_tables.get((is_strong, cf_motion, next_motion))
+        if table is None:
+            has_next = next_motion is not None
+            cp_next = cf_motion + (next_motion or 0) + offsets[None, None, :]
+            table = sum(_soft_terms(rules, 0, cf_motion, offsets[:, None, None], cf_motion + offsets[None, :, None],
+                                    cp_next, has_next, np.bool_(is_strong))).astype(np.float32)
+            table = table.transpose(2, 0, 1) if has_next else table[:, :, 0]
+            score_tables[(is_strong, cf_motion, next_motion)] = table
+        return table
+
+    def position_scores(cf, i):
+        """(tablolar, satir indeksi): i. pozisyonun ([sonraki,] onceki, simdiki) puanlari."""
+        is_strong = (i % 2 == 0)
+        if i == cf.shape[1] - 1:
+            motions = (cf[:, i] - cf[:, i - 1])[:, None]
+        else:
+            motions = np.stack([cf[:, i] - cf[:, i - 1], cf[:, i + 1] - cf[:, i]], axis=1)
+        unique, inverse = np.unique(motions, axis=0, return_inverse=True)
+        tables = np.array([score_table(is_strong, int(row[0]), int(row[1]) if len(row) > 1 else None)
+                           for row in unique])
+        return tables, inverse.reshape(-1)
+
+    results = [None] * len(cantus_firmi)
+    by_length = {}
+    for index, cf in enumerate(cantus_firmi):
+        by_length.setdefault(len(cf), []).append(index)
+
+    for n, indices in by_length.items():
+        for start in range(0, len(indices), chunk_size):
+            chunk = indices[start:start + chunk_size]
+            if n == 0:
+                for index in chunk: results[index] = {'melody': [], 'score': 0}
+                continue
+            cf = np.array([cantus_firmi[index] for index in chunk], dtype=np.int64).reshape(len(chunk), n)
+            key_col = np.array([key_ids[tuple(keys[index])] for index in chunk])
+            rows = np.arange(len(chunk))
+
+            base = scale_bits[key_col[:, None], cf % 12]
+            base[:, 2::2] &= strong_bits
+            if n > 1: base[:, n - 1] &= final_bits
+            valid = [None] * n
+            if n > 1:
+                motions, inverse = np.unique(cf[:, 1:] - cf[:, :-1], return_inverse=True)
+                tables = np.array([transition_table(int(m)) for m in motions])
+                inverse = inverse.reshape(len(chunk), n - 1)
+                for i in range(1, n):
+                    valid[i] = tables[inverse[:, i - 1]] & base[:, i, None, :]
+
+            # Geriye dogru: value[i][b, j, k] = cp[i-1]=j, cp[i]=k iken i..n-1 en iyi puani
+            notes = cf[:, :, None] + offsets
+            value = [None] * n
+            scores = [None] + [position_scores(cf, i) for i in range(1, n)]
+            if n > 1:
+                tables, inverse = scores[n - 1]
+                value[n - 1] = np.where(valid[n - 1], tables[inverse], -np.inf)
+            for i in range(n - 2, 0, -1):
+                tables, inverse = scores[i]
+                total = tables[inverse] + value[i + 1].transpose(0, 2, 1)[:, :, None, :]
+                value[i] = np.where(valid[i], total.max(axis=1), -np.inf)
+            first = value[1].max(axis=2) if n > 1 else np.zeros((len(chunk), width), dtype=np.float32)
+            value[0] = np.where(base[:, 0], first, -np.inf)
+            best = value[0].max(axis=1)
+
+            # Ileri yonde: her adimda backtrack sirasindaki ilk optimum
+            melody = np.zeros((len(chunk), n), dtype=np.int64)
+            melody[:, 0] = first_optimum(value[0] == best[:, None], key_col, cf[:, 0])
+            for i in range(1, n):
+                prev = melody[:, i - 1]
+                rest = value[i][rows, prev]
+                if i == 1:
+                    target, gained = best[:, None], 0
+                else:
+                    before = melody[:, i - 2]
+                    target = value[i - 1][rows, before, prev][:, None]
+                    tables, inverse = scores[i - 1]
+                    gained = tables[inverse, :, before, prev]
+                candidates = (rest > -np.inf) & (gained + rest == target)
+                melody[:, i] = first_optimum(candidates, key_col, cf[:, i], cf[:, i - 1], notes[rows, i - 1, prev])
+
+            for b, index in enumerate(chunk):
+                if best[b] == -np.inf: continue
+                results[index] = {'melody': (notes[b, np.arange(n), melody[b]]).tolist(), 'score': int(best[b])}
+    return results
+
+# --- PARALEL ALT AGAC ISCILERI ---
+_PREFIX_WORKER = {}
+
+def _init_prefix_worker(config, limits):
+    cf, key_root_name, mode, min_interval, max_interval, rules, top_k, open_end = config
+    solver = UniversalBaroqueSolver(cf, key_root_name=key_root_name, mode=mode)
+    solver.min_interval, solver.max_interval = min_interval, max_interval
+    solver.rules, solver.top_k, solver._open_end = rules, top_k, open_end
+    solver._set_limits(*limits)
+    _PREFIX_WORKER['solver'] = solver
+
+def _solve_prefix(task):
+    """Bir onekin alt agacini budget yapraga kadar gezer: (depo, yaprak, kesildi_mi, dugum)."""
+    prefix, budget = task
+    solver = _PREFIX_WORKER['solver']
+    solver._reset_solutions()
+    solver.target_solutions = budget
+    solver._stopped, solver.search_nodes = False, 0
+    if len(solver.cf) + 100 > sys.getrecursionlimit():
+        solver.backtrack_iterative(prefix)
+    else:
+        solver.backtrack(list(prefix))
+    return solver.solutions, solver.num_solutions, solver._stopped, solver.search_nodes
+
 # --- TEST ---
 if __name__ == "__main__":
     # ORNEK: Mecano - Hijo de la Luna
@@ -258,7 +1877,7 @@ if __name__ == "__main__":
     print("\n Parça: Hijo de la Luna (Barok Stil Uyarlamasi)")
     
     # Solver'i 'E' (Mi) ve 'Minor' olarak baslatiyoruz
-    solver = UniversalBaroqueSolver(cf_luna, key_root_name='E', mode='minor')
+    solver = UniversalBaroqueSolver(cf_luna, key_root_name='E', mode='minor', verbose=True)
     result = solver.solve()
     
     if result:
@@ -3,20 +3,25 @@ import sys
 import os
 import subprocess
 import collections
+import logging
 from midiutil import MIDIFile
 
+logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
 # --- KÜTÜPHANE KONTROLLERİ ---
-print("--- SİSTEM KONTROLÜ ---")
+logger.info("--- SİSTEM KONTROLÜ ---")
 try:
     from baroque_engine import UniversalBaroqueSolver 
-    print("[OK] Baroque Engine yüklü.")
+    logger.info("[OK] Baroque Engine yüklü.")
 except ImportError:
     pass 
 
 try:
     import matplotlib.pyplot as plt
     GRAPH_AVAILABLE = True
-    print("[OK] Matplotlib yüklü.")
+    logger.info("[OK] Matplotlib yüklü.")
 except ImportError:
     GRAPH_AVAILABLE = False
 
@@ -24,11 +29,11 @@ try:
     import music21
     from music21 import instrument, clef, note
     MUSIC21_AVAILABLE = True
-    print("[OK] Music21 yüklü.")
+    logger.info("[OK] Music21 yüklü.")
 except ImportError:
     MUSIC21_AVAILABLE = False
 
-print("-----------------------\n")
+logger.info("-----------------------\n")
 
 # --- 1. MELODİK YAPI (GENİŞLETİLMİŞ) ---
 
@@ -228,13 +233,13 @@ def save_orchestrated_midi(song_structure, arrangement, filename):
 
     with open(filename, "wb") as output_file:
         midi.writeFile(output_file)
-    print(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
+    logger.info(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
     return mel_data
 
 # --- PDF & GRAFİK ---
 def convert_midi_to_pdf_via_xml(midi_filename):
     if not MUSIC21_AVAILABLE: return
-    print(f"\n[i] '{midi_filename}' için PDF hazırlanıyor...")
+    logger.info(f"\n[i] '{midi_filename}' için PDF hazırlanıyor...")
     
     paths = [
         '/Applications/MuseScore 4.app/Contents/MacOS/mscore',
@@ -258,12 +263,12 @@ def convert_midi_to_pdf_via_xml(midi_filename):
         score.write('musicxml', fp=xml_filename)
         pdf_output = midi_filename.replace(".mid", "_WesterosScore.pdf")
         subprocess.run([musescore_path, xml_filename, "-o", pdf_output], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-        if os.path.exists(pdf_output): print(f"[+] PDF HAZIR: {pdf_output}")
+        if os.path.exists(pdf_output): logger.info(f"[+] PDF HAZIR: {pdf_output}")
     except: pass
 
 def analyze_composition(full_mel, midi_filename):
     if not GRAPH_AVAILABLE: return
-    print("\n[i] Grafik çiziliyor...")
+    logger.info("\n[i] Grafik çiziliyor...")
     note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
     def get_note_name(midi_val): return note_names[midi_val % 12]
     melody_names = [get_note_name(n) for n in full_mel if n > 0]
@@ -274,7 +279,7 @@ def analyze_composition(full_mel, midi_filename):
     plt.bar(list(melody_counts.keys()), list(melody_counts.values()), color='darkred', alpha=0.8)
     plt.title('GoT (Extended Edition) - Nota Analizi', fontsize=14)
     plt.savefig(midi_filename.replace(".mid", "_Analiz.png"))
-    print(f"[+] GRAFİK HAZIR.")
+    logger.info(f"[+] GRAFİK HAZIR.")
 
 # --- ANA PROGRAM ---
 if __name__ == "__main__":
@@ -3,13 +3,19 @@ import sys
 import os
 import subprocess
 import collections
+import argparse
+import logging
 from midiutil import MIDIFile
 
+logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
 # --- GEREKLİ KÜTÜPHANE KONTROLLERİ ---
 try:
-    from baroque_engine import UniversalBaroqueSolver 
+    from baroque_engine import SolutionCache, solve_sections
 except ImportError:
-    print("\n[!] HATA: 'baroque_engine.py' dosyası bulunamadı.")
+    logger.error("\n[!] HATA: 'baroque_engine.py' dosyası bulunamadı.")
     sys.exit(1)
 
 try:
@@ -17,7 +23,12 @@ try:
     GRAPH_AVAILABLE = True
 except ImportError:
     GRAPH_AVAILABLE = False
-    print("[!] Matplotlib yüklü değil, grafik çizilemeyecek.")
+    logger.warning("[!] Matplotlib yüklü değil, grafik çizilemeyecek.")
+
+# --- ÇÖZÜM ÖNBELLEĞİ ---
+# Aynı bölümler (verse, chorus, intro) hem aynı çalıştırmada hem de sonraki
+# çalıştırmalarda tekrar çözülmez.
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".baroque_cache.sqlite")
 
 # --- MELODİK YAPI TASLARI ---
 verse_theme_a = [71, 72, 71, 69, 67, 66, 64] 
@@ -61,7 +72,7 @@ MIXER_SETTINGS = {
 
 # --- OTOMATİK PDF DÖNÜŞTÜRÜCÜ ---
 def convert_midi_to_pdf(midi_filename):
-    print(f"\n[i] '{midi_filename}' otomatik olarak PDF'e dönüştürülüyor...")
+    logger.info(f"\n[i] '{midi_filename}' otomatik olarak PDF'e dönüştürülüyor...")
     
     # MuseScore Yolu (MacOS için)
     musescore_path = '/Applications/MuseScore 4.app/Contents/MacOS/mscore'
@@ -71,7 +82,7 @@ def convert_midi_to_pdf(midi_filename):
         musescore_path = '/Applications/MuseScore Studio.app/Contents/MacOS/mscore'
     
     if not os.path.exists(musescore_path):
-        print("[!] MuseScore uygulaması bulunamadı. PDF oluşturulamıyor.")
+        logger.warning("[!] MuseScore uygulaması bulunamadı. PDF oluşturulamıyor.")
         return
 
     pdf_output = midi_filename.replace(".mid", ".pdf")
@@ -81,18 +92,18 @@ def convert_midi_to_pdf(midi_filename):
         process = subprocess.run(command, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
         
         if process.returncode == 0 or os.path.exists(pdf_output):
-            print(f"[+] BAŞARILI: PDF Notası Oluşturuldu -> {pdf_output}")
+            logger.info(f"[+] BAŞARILI: PDF Notası Oluşturuldu -> {pdf_output}")
         else:
-            print("[!] PDF oluşturma işlemi tamamlanamadı.")
+            logger.warning("[!] PDF oluşturma işlemi tamamlanamadı.")
     except Exception as e:
-        print(f"[!] Bir hata oluştu: {e}")
+        logger.warning(f"[!] Bir hata oluştu: {e}")
 
 # --- ANALİZ GRAFİĞİ ---
 def analyze_composition(full_cf, full_cp, midi_filename):
     if not GRAPH_AVAILABLE:
         return
 
-    print("\n[i] Analiz grafiği oluşturuluyor...")
+    logger.info("\n[i] Analiz grafiği oluşturuluyor...")
     note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
     def get_note_name(midi_val): return note_names[midi_val % 12]
     
@@ -118,7 +129,7 @@ def analyze_composition(full_cf, full_cp, midi_filename):
     
     png_name = midi_filename.replace(".mid", "_Analiz.png")
     plt.savefig(png_name)
-    print(f"[+] GRAFİK KAYDEDİLDİ: {png_name}")
+    logger.info(f"[+] GRAFİK KAYDEDİLDİ: {png_name}")
 
 def get_human_touch(inst_name, measure_len, base_velocity):
     timing_offset = random.uniform(-0.01, 0.01) 
@@ -208,9 +219,9 @@ def save_orchestrated_waltz_midi(full_cf, full_cp, arrangement, filename, solo_r
     with open(filename, "wb") as output_file:
         midi.writeFile(output_file)
     
-    print(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
+    logger.info(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
 
-def generate_full_song_structure():
+def generate_full_song_structure(workers=1, use_cache=True):
     song_structure = []
     verse_block = verse_theme_a + verse_theme_b
     chorus_block = chorus_high + chorus_low
@@ -238,7 +249,16 @@ def generate_full_song_structure():
     solo_end_index = 0
     current_note_count = 0
     
-    print(f"\n[>] Hijo de la Luna (Split Choir Mix) Hazırlanıyor...")
+    logger.info(f"\n[>] Hijo de la Luna (Split Choir Mix) Hazırlanıyor...")
+    
+    # Bölümler birbirinden bağımsız: hepsi birlikte (isteğe bağlı paralel) çözülür,
+    # sonuçlar şarkı sırasıyla geri gelir. Solo bölümün sonucu kullanılmadığı için çözülmez.
+    cache = SolutionCache(CACHE_PATH) if use_cache else None
+    solved_sections = [section for section in song_structure if section != solo_section_content]
+    solved = iter(solve_sections(solved_sections, key_root_name='E', mode='minor',
+                                 target_solutions=150, workers=workers, cache=cache))
+    if cache is not None:
+        cache.close()
     
     for section in song_structure:
         is_this_solo = (section == solo_section_content)
@@ -246,9 +266,7 @@ def generate_full_song_structure():
             solo_start_index = current_note_count
             solo_end_index = current_note_count + len(section)
 
-        solver = UniversalBaroqueSolver(section, key_root_name='E', mode='minor')
-        solver.target_solutions = 150 
-        result = solver.solve()
+        result = None if is_this_solo else next(solved)
         
         if is_this_solo:
             full_cf.extend(section)
@@ -264,7 +282,15 @@ def generate_full_song_structure():
     return full_cf, full_cp, (solo_start_index, solo_end_index)
 
 if __name__ == "__main__":
-    cf, cp, solo_range = generate_full_song_structure()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="Bölümleri paralel çözecek süreç sayısı")
+    parser.add_argument("--no-cache", action="store_true", help="Çözüm önbelleğini (.baroque_cache.sqlite) kullanma")
+    parser.add_argument("--verbose", action="store_true", help="Çözücünün arama mesajlarını da göster")
+    args = parser.parse_args()
+    if args.verbose:
+        logging.getLogger("baroque_engine").setLevel(logging.DEBUG)
+
+    cf, cp, solo_range = generate_full_song_structure(workers=args.workers, use_cache=not args.no_cache)
     
     if cf:
         orchestra_config = {
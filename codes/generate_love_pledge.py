@@ -3,35 +3,40 @@ import sys
 import os
 import subprocess
 import collections
+import logging
 from midiutil import MIDIFile
 
+logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
 # --- KÜTÜPHANE KONTROLLERİ ---
-print("--- SİSTEM KONTROLÜ ---")
+logger.info("--- SİSTEM KONTROLÜ ---")
 try:
     from baroque_engine import UniversalBaroqueSolver 
-    print("[OK] Baroque Engine yüklü.")
+    logger.info("[OK] Baroque Engine yüklü.")
 except ImportError:
     pass 
 
 try:
     import matplotlib.pyplot as plt
     GRAPH_AVAILABLE = True
-    print("[OK] Matplotlib yüklü.")
+    logger.info("[OK] Matplotlib yüklü.")
 except ImportError:
     GRAPH_AVAILABLE = False
-    print("[!] UYARI: Matplotlib yok.")
+    logger.warning("[!] UYARI: Matplotlib yok.")
 
 try:
     import music21
     # Clef ve Note modülleri
     from music21 import stream, converter, instrument, clef, note
     MUSIC21_AVAILABLE = True
-    print("[OK] Music21 yüklü.")
+    logger.info("[OK] Music21 yüklü.")
 except ImportError:
     MUSIC21_AVAILABLE = False
-    print("[!!!] KRİTİK: 'music21' yok.")
+    logger.error("[!!!] KRİTİK: 'music21' yok.")
 
-print("-----------------------\n")
+logger.info("-----------------------\n")
 
 # --- MELODİK YAPI ---
 theme_a = [64, 67, 66, 64, 63, 64, 66, 67, 69, 71, 74, 71, 69, 67, 66, 64]
@@ -83,7 +88,7 @@ def convert_midi_to_pdf_selective(midi_filename):
     if not MUSIC21_AVAILABLE:
         return
 
-    print(f"\n[i] '{midi_filename}' için SEÇİLMİŞ PARTİSYON PDF'i hazırlanıyor...")
+    logger.info(f"\n[i] '{midi_filename}' için SEÇİLMİŞ PARTİSYON PDF'i hazırlanıyor...")
     
     # MuseScore Yolu
     paths = [
@@ -98,7 +103,7 @@ def convert_midi_to_pdf_selective(midi_filename):
             break
             
     if not musescore_path:
-        print("[!] MuseScore bulunamadı.")
+        logger.warning("[!] MuseScore bulunamadı.")
         return
 
     try:
@@ -155,18 +160,18 @@ def convert_midi_to_pdf_selective(midi_filename):
         subprocess.run(command, stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
         
         if os.path.exists(pdf_output):
-            print(f"[+] BAŞARILI: Seçilmiş Partisyon PDF Hazır -> {pdf_output}")
+            logger.info(f"[+] BAŞARILI: Seçilmiş Partisyon PDF Hazır -> {pdf_output}")
             try: os.remove(xml_filename)
             except: pass
         else:
-            print("[!] PDF oluşturulamadı.")
+            logger.warning("[!] PDF oluşturulamadı.")
             
     except Exception as e:
-        print(f"[!] PDF HATASI: {e}")
+        logger.error(f"[!] PDF HATASI: {e}")
 
 def analyze_composition(full_mel, full_bas, midi_filename):
     if not GRAPH_AVAILABLE: return
-    print("\n[i] Grafik çiziliyor...")
+    logger.info("\n[i] Grafik çiziliyor...")
     note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
     def get_note_name(midi_val): return note_names[midi_val % 12]
     melody_names = [get_note_name(n) for n in full_mel]
@@ -183,7 +188,7 @@ def analyze_composition(full_mel, full_bas, midi_filename):
     plt.plot(full_bas, label='Bas', color='gray', linestyle='--')
     plt.legend()
     plt.savefig(midi_filename.replace(".mid", "_Analiz.png"))
-    print(f"[+] GRAFİK HAZIR.")
+    logger.info(f"[+] GRAFİK HAZIR.")
 
 def generate_safe_harmony(segment):
     harmony = []
@@ -273,7 +278,7 @@ def save_orchestrated_midi(full_mel, full_bas, arrangement, filename, solo_range
 
     with open(filename, "wb") as output_file:
         midi.writeFile(output_file)
-    print(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
+    logger.info(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
     return all_insts
 
 # --- ŞARKI TRAFİĞİ ---
@@ -300,7 +305,7 @@ def generate_full_song_structure():
     solo_end = 0
     current = 0
     
-    print(f"\n[>] Across the Stars (Full Orchestra) Hazırlanıyor...")
+    logger.info(f"\n[>] Across the Stars (Full Orchestra) Hazırlanıyor...")
     
     for section in structure:
         if section == solo_sect:
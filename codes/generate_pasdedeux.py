@@ -3,20 +3,25 @@ import sys
 import os
 import subprocess
 import collections
+import logging
 from midiutil import MIDIFile
 
+logger = logging.getLogger(__name__)
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
 # --- KÜTÜPHANE KONTROLLERİ ---
-print("--- SİSTEM KONTROLÜ ---")
+logger.info("--- SİSTEM KONTROLÜ ---")
 try:
     from baroque_engine import UniversalBaroqueSolver 
-    print("[OK] Baroque Engine yüklü.")
+    logger.info("[OK] Baroque Engine yüklü.")
 except ImportError:
     pass 
 
 try:
     import matplotlib.pyplot as plt
     GRAPH_AVAILABLE = True
-    print("[OK] Matplotlib yüklü.")
+    logger.info("[OK] Matplotlib yüklü.")
 except ImportError:
     GRAPH_AVAILABLE = False
 
@@ -24,11 +29,11 @@ try:
     import music21
     from music21 import instrument, clef, note, stream
     MUSIC21_AVAILABLE = True
-    print("[OK] Music21 yüklü.")
+    logger.info("[OK] Music21 yüklü.")
 except ImportError:
     MUSIC21_AVAILABLE = False
 
-print("-----------------------\n")
+logger.info("-----------------------\n")
 
 # --- 1. MELODİK YAPI ---
 theme_a = [(79, 1.5), (78, 0.5), (76, 1.0), (74, 1.0), (72, 1.5), (71, 0.5), (69, 1.0), (67, 1.0), (66, 1.5), (64, 0.5), (62, 1.0), (60, 1.0), (59, 2.0), (62, 1.0), (67, 1.0)]
@@ -137,13 +142,13 @@ def save_orchestrated_midi(song_structure, arrangement, filename):
 
     with open(filename, "wb") as output_file:
         midi.writeFile(output_file)
-    print(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
+    logger.info(f"\n[+] DOSYA KAYDEDİLDİ: {filename}")
     return mel_data
 
 # --- PDF & GRAFİK (GÜNCELLENMİŞ) ---
 def convert_midi_to_pdf_via_xml(midi_filename):
     if not MUSIC21_AVAILABLE: return
-    print(f"\n[i] '{midi_filename}' için PDF hazırlanıyor...")
+    logger.info(f"\n[i] '{midi_filename}' için PDF hazırlanıyor...")
     
     paths = [
         '/Applications/MuseScore 4.app/Contents/MacOS/mscore',
@@ -163,13 +168,13 @@ def convert_midi_to_pdf_via_xml(midi_filename):
         score.write('musicxml', fp=xml_filename)
         pdf_output = midi_filename.replace(".mid", "_AnalyticScore.pdf")
         subprocess.run([musescore_path, xml_filename, "-o", pdf_output], stderr=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
-        if os.path.exists(pdf_output): print(f"[+] PDF HAZIR: {pdf_output}")
+        if os.path.exists(pdf_output): logger.info(f"[+] PDF HAZIR: {pdf_output}")
     except: pass
 
 # --- [YENİ] DETAYLI ANALİZ GRAFİĞİ ---
 def analyze_composition(full_mel, midi_filename):
     if not GRAPH_AVAILABLE: return
-    print("\n[i] Detaylı analiz grafikleri oluşturuluyor...")
+    logger.info("\n[i] Detaylı analiz grafikleri oluşturuluyor...")
     
     # Nota isimleri (0=C, 1=C#...)
     note_names_map = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
@@ -205,7 +210,7 @@ def analyze_composition(full_mel, midi_filename):
     # Kaydet
     plt.tight_layout()
     plt.savefig(midi_filename.replace(".mid", "_Analiz.png"), dpi=150)
-    print(f"[+] GRAFİK HAZIR: {midi_filename.replace('.mid', '_Analiz.png')}")
+    logger.info(f"[+] GRAFİK HAZIR: {midi_filename.replace('.mid', '_Analiz.png')}")
 
 # --- ANA PROGRAM ---
 if __name__ == "__main__":